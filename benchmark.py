@@ -0,0 +1,138 @@
+import argparse
+import gc
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import pandas as pd
+from feature_engineering import KEYS, normalize_dates, aggregate_numeric, build_features
+from scoring import compute_aihs
+from ml_pipeline import run_analytical_pipeline
+from synthetic_data import generate_sources
+
+# One row per (commit, size, stage) is appended here
+RESULTS_PATH = "bench_results/results.csv"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _stages(enroll, demo, bio, model_dir):
+    """
+    (name, setup, run) per hot path. setup builds the stage's input
+    outside the timed region; run receives it.
+    """
+    normalized = normalize_dates(enroll)
+    features = build_features(enroll, demo, bio)
+    return [
+        ("normalize_dates", lambda: enroll, normalize_dates),
+        ("aggregate_numeric", lambda: normalized, lambda df: aggregate_numeric(df, KEYS)),
+        ("build_features", lambda: (enroll, demo, bio), lambda srcs: build_features(*srcs)),
+        ("compute_aihs", lambda: features, compute_aihs),
+        # run_analytical_pipeline scores in place, so it gets a fresh copy
+        ("run_analytical_pipeline", lambda: features.copy(),
+         lambda df: run_analytical_pipeline(df, model_dir=model_dir)),
+    ]
+
+def _time(setup, run, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        gc.collect()
+        start = time.perf_counter()
+        run(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _peak_mb(setup, run):
+    # A separate traced run: tracemalloc slows the timed runs down
+    arg = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+def git_revision():
+    """
+    Short HEAD hash, with '+dirty' when the work tree has changes.
+    """
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, check=True, cwd=MODULE_DIR).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True, cwd=MODULE_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return rev + ("+dirty" if dirty else "")
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=0, repeat=3, memory=True, stages=None):
+    """
+    Times each hot path on synthetic data of every size (best of repeat
+    runs) and, with memory=True, records its peak traced allocation.
+    Returns one row per (size, stage).
+    """
+    rows = []
+    revision = git_revision()
+    stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with tempfile.TemporaryDirectory() as model_dir:
+        for n_rows in sizes:
+            enroll, demo, bio = generate_sources(n_rows, seed)
+            for name, setup, run in _stages(enroll, demo, bio, model_dir):
+                if stages and name not in stages:
+                    continue
+                seconds = _time(setup, run, repeat)
+                peak = _peak_mb(setup, run) if memory else float("nan")
+                print(f" {n_rows:>12,} rows  {name:<24} {seconds:9.3f}s  {peak:9.1f} MB")
+                rows.append({
+                    "commit": revision, "timestamp": stamp, "rows": n_rows, "stage": name,
+                    "seconds": seconds, "peak_mb": peak, "repeat": repeat, "seed": seed,
+                    "python": platform.python_version(), "pandas": pd.__version__,
+                })
+            del enroll, demo, bio
+            gc.collect()
+    return pd.DataFrame(rows)
+
+def save_results(results, path=RESULTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+    print(f"Saved: {path}")
+
+def compare(base, head, path=RESULTS_PATH):
+    """
+    Latest results of two commits side by side; ratio > 1 means head is slower.
+    """
+    df = pd.read_csv(path)
+    unknown = [rev for rev in (base, head) if rev not in set(df["commit"])]
+    if unknown:
+        raise ValueError(f"No stored results for {unknown}; have {sorted(set(df['commit']))}")
+    latest = df.sort_values("timestamp").groupby(["commit", "rows", "stage"]).last()
+    table = pd.concat(
+        {rev: latest.loc[rev][["seconds", "peak_mb"]] for rev in (base, head)}, axis=1
+    )
+    table[("ratio", "seconds")] = table[(head, "seconds")] / table[(base, "seconds")]
+    table[("ratio", "peak_mb")] = table[(head, "peak_mb")] / table[(base, "peak_mb")]
+    return table
+
+if __name__ == "__main__":
+    # python benchmark.py [--sizes 10000 100000 1000000] | --compare BASE HEAD
+    parser = argparse.ArgumentParser(description="Benchmarks for the pipeline hot paths")
+    parser.add_argument("--sizes", nargs="+", type=lambda s: int(s.replace("_", "")), default=DEFAULT_SIZES)
+    parser.add_argument("--stages", nargs="+", help="Only these stages.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced peak-memory run.")
+    parser.add_argument("--results", default=RESULTS_PATH)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"),
+                        help="Compare two stored commits instead of running.")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare(*args.compare, path=args.results).to_string(float_format="%.3f"))
+    else:
+        results = run_benchmarks(args.sizes, args.seed, args.repeat, not args.no_memory, args.stages)
+        save_results(results, args.results)
@@ -1,15 +1,20 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+from rendering import pyplot, seaborn
+from partitioned_output import PARQUET_ROOT, load_results
+from validation import ValidationReport
+from temporal import series_dips
 
-def clean_data_artifacts(input_path="output/aadhaar_pulse_analysis.csv", output_path="aadhaar_pulse_clean.csv"):
+# Checks that apply to the aggregated output (no dates or raw counts left)
+ARTIFACT_RULES = ["month", "year", "pincode"]
+
+def clean_data_artifacts(input_path=PARQUET_ROOT, output_path="aadhaar_pulse_clean.csv"):
     """
     Removes aggregation artifacts (summed years/months) from the dataset.
     """
     print(f"Loading data from {input_path}...")
     try:
-        df = pd.read_csv(input_path)
+        # Partitioned Parquet output, or a CSV export if given a .csv path
+        df = load_results(input_path)
     except FileNotFoundError:
         print("Error: File not found. Make sure you ran the pipeline first.")
         return None
@@ -19,18 +24,11 @@ def clean_data_artifacts(input_path="output/aadhaar_pulse_analysis.csv", output_
     # --- CLEANING LOGIC ---
     # 1. Valid Month Check: Month must be 1-12
     # 2. Valid Year Check: Year must be reasonable (e.g., 2010-2030)
-    # 3. Valid Pincode Check: Pincodes are 6 digits (< 1,000,000)
-    
-    # We use 'coerce' to handle non-numeric garbage if any
-    df['month'] = pd.to_numeric(df['month'], errors='coerce')
-    df['year'] = pd.to_numeric(df['year'], errors='coerce')
-    df['pincode'] = pd.to_numeric(df['pincode'], errors='coerce')
-
-    df_clean = df[
-        (df['month'].between(1, 12)) & 
-        (df['year'].between(2010, 2030)) & 
-        (df['pincode'] < 1000000)
-    ].copy()
+    # 3. Valid Pincode Check: Pincodes are 6 digits
+    # (one vectorized pass, see validation.RULES; non-numeric garbage is rejected too)
+    report = ValidationReport(ARTIFACT_RULES)
+    df_clean = report.apply(df).copy()
+    print(f" - {report}")
 
     # Re-create the 'period' column to ensure it's correct
     df_clean['period'] = df_clean['year'].astype(int).astype(str) + "-" + df_clean['month'].astype(int).astype(str).str.zfill(2)
@@ -48,12 +46,17 @@ def plot_event_test(df, output_path="output/event_validation.png"):
     Plots the Time Series to check for Seasonality/Event Dips.
     """
     print("Generating Event Test Visualization...")
+    plt, sns = pyplot(), seaborn()
     plt.figure(figsize=(12, 6))
     
     # Group by Period to get the National/District Average Trend
     # We sort by 'period' to ensure the line graph connects correctly
-    temporal_trend = df.groupby('period')['AIHS'].mean().reset_index()
-    temporal_trend = temporal_trend.sort_values('period')
+    # (a frame that already has one row per period, in order, is used as is)
+    if df['period'].is_unique and df['period'].is_monotonic_increasing:
+        temporal_trend = df[['period', 'AIHS']].reset_index(drop=True)
+    else:
+        temporal_trend = df.groupby('period')['AIHS'].mean().reset_index()
+        temporal_trend = temporal_trend.sort_values('period', ignore_index=True)
     
     # Plotting
     sns.lineplot(data=temporal_trend, x='period', y='AIHS', marker='o', color='#2c3e50', linewidth=2.5)
@@ -66,30 +69,31 @@ def plot_event_test(df, output_path="output/event_validation.png"):
     plt.grid(True, linestyle='--', alpha=0.5)
     
     # Highlight the "Seasonality" or "Dip"
-    # Identify the lowest point automatically
-    min_idx = temporal_trend['AIHS'].idxmin()
-    min_period = temporal_trend.loc[min_idx, 'period']
-    min_score = temporal_trend.loc[min_idx, 'AIHS']
-    
-    plt.annotate(f'Seasonal Dip\n({min_period})', 
-                 xy=(min_idx, min_score), 
-                 xytext=(min_idx, min_score + 5),
-                 arrowprops=dict(facecolor='red', shrink=0.05),
-                 fontsize=10, color='red', fontweight='bold')
+    # Periods whose mean AIHS is a z-score dip (the lowest one if none is);
+    # x is the position on the categorical period axis
+    for pos in series_dips(temporal_trend['AIHS']):
+        min_period = temporal_trend['period'].iloc[pos]
+        min_score = temporal_trend['AIHS'].iloc[pos]
+        plt.annotate(f'Seasonal Dip\n({min_period})',
+                     xy=(pos, min_score),
+                     xytext=(pos, min_score + 5),
+                     arrowprops=dict(facecolor='red', shrink=0.05),
+                     fontsize=10, color='red', fontweight='bold')
 
     plt.tight_layout()
     
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     plt.savefig(output_path)
+    plt.close()
     print(f"Chart saved to: {output_path}")
 
 if __name__ == "__main__":
-    # 1. Clean the Data
-    df_clean = pd.read_csv("output/aadhaar_pulse_analysis.csv")
-    
-    # 2. Run the Event Test if data is valid
+    # 1. Clean the scored output (drops rows failing the month/year/pincode rules)
+    df_clean = clean_data_artifacts()
+
+    # 2. Run the Event Test if data is valid (plot_event_test takes the per-period mean)
     if df_clean is not None and not df_clean.empty:
         plot_event_test(df_clean)
     else:
-        print("Dataset empty after cleaning. Check input files.")
\ No newline at end of file
+        print("Dataset empty after cleaning. Check input files.")
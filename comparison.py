@@ -0,0 +1,100 @@
+import os
+import pandas as pd
+from partitioned_output import PARQUET_ROOT, load_results, read_partitioned
+from results_store import DB_PATH, query_district
+
+METRICS = ["score_mbu", "score_drift", "AIHS"]
+
+# Box plots are drawn from these precomputed quantiles (whiskers at 5%/95%)
+BOX_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+def _empty_scored(columns):
+    # No rows, but the dtypes a real result has, so the summaries still work
+    return pd.DataFrame({c: pd.Series(dtype="float64" if c in METRICS else "object") for c in columns})
+
+def load_scored(source=PARQUET_ROOT, districts="all", db_path=DB_PATH):
+    """
+    Only the columns the comparison charts need. For named districts
+    (case-insensitive) the rows come from indexed lookups in the results
+    store, or else from a Parquet read with the district filter pushed
+    down; "all" reads the national output.
+    """
+    columns = ["state", "district", "period"] + METRICS
+    if districts == "all" or source.endswith(".csv"):
+        return load_results(source, columns=columns)
+    if os.path.exists(db_path):
+        # District lookups in the store are case-insensitive
+        frames = [query_district(d, columns=columns, db_path=db_path) for d in districts]
+        frames = [f for f in frames if not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else _empty_scored(columns)
+    # Parquet filters match exactly: resolve the stored spellings of each
+    # name from the district column alone, then push those down
+    wanted = {d.lower() for d in districts}
+    names = pd.Series(read_partitioned(["district"], root=source)["district"].unique())
+    spellings = sorted(names[names.str.lower().isin(wanted)])
+    if not spellings:
+        return _empty_scored(columns)
+    return read_partitioned(columns, districts=spellings, root=source)
+
+def _labels(index):
+    # District names repeat across states, so add the state only when needed
+    names = index.get_level_values("district")
+    dupes = set(names[names.duplicated(keep=False)])
+    return [f"{d} ({s})" if d in dupes else d for s, d in index]
+
+def summarize_districts(df, districts="all"):
+    """
+    Everything the comparison charts draw, from one grouped pass over the
+    scored output:
+
+      means   one row per district: row count and mean of each metric
+      box     per district and metric, the BOX_QUANTILES (for Axes.bxp)
+      series  period x district table of mean AIHS
+
+    districts is a list of names (case-insensitive) or "all". Names with no
+    rows are reported in summary["missing"] rather than invented.
+    """
+    missing = []
+    if districts != "all":
+        wanted = {d.lower(): d for d in districts}
+        lowered = df["district"].str.lower()
+        df = df[lowered.isin(wanted)]
+        found = set(lowered[lowered.isin(wanted)].unique())
+        missing = [name for key, name in wanted.items() if key not in found]
+    if df.empty:
+        means = pd.DataFrame(columns=["n_rows"] + METRICS)
+        return {"means": means, "box": {}, "series": pd.DataFrame(), "missing": missing}
+
+    # 1. Per (district, period) sums and counts; district means follow from these
+    by_period = df.groupby(["state", "district", "period"], observed=True)[METRICS].agg(["sum", "count"])
+    sums = by_period.xs("sum", axis=1, level=1)
+    counts = by_period.xs("count", axis=1, level=1)
+
+    district_sums = sums.groupby(level=["state", "district"]).sum()
+    district_counts = counts.groupby(level=["state", "district"]).sum()
+    means = district_sums / district_counts
+    means.insert(0, "n_rows", df.groupby(["state", "district"], observed=True).size())
+
+    series = (sums["AIHS"] / counts["AIHS"]).unstack(["state", "district"]).sort_index()
+
+    # 2. Distribution quantiles per district
+    quantiles = df.groupby(["state", "district"], observed=True)[METRICS].quantile(BOX_QUANTILES)
+
+    labels = _labels(means.index)
+    label_of = dict(zip(means.index, labels))
+    means.index = labels
+    series.columns = [label_of[c] for c in series.columns]
+
+    box = {}
+    for key, label in label_of.items():
+        q = quantiles.loc[key]
+        box[label] = {
+            m: {
+                "label": label,
+                "whislo": q.loc[0.05, m], "q1": q.loc[0.25, m], "med": q.loc[0.5, m],
+                "q3": q.loc[0.75, m], "whishi": q.loc[0.95, m], "fliers": [],
+            }
+            for m in METRICS
+        }
+
+    return {"means": means, "box": box, "series": series, "missing": missing}
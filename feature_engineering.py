@@ -1,6 +1,14 @@
 import pandas as pd
 import numpy as np
+from schema import compact_inputs, compact_frame
+from key_codec import left_join_packed
+from instrumentation import instrumented
+from quantile_sketch import ALL, sketch_column, group_labels
 
+# The Unique ID Keys
+KEYS = ["state", "district", "pincode", "year", "month"]
+
+@instrumented()
 def normalize_dates(df):
     df = df.copy()
     df["date"] = pd.to_datetime(df["date"], dayfirst=True, errors="coerce")
@@ -8,6 +16,7 @@ def normalize_dates(df):
     df["month"] = df["date"].dt.month
     return df
 
+@instrumented()
 def aggregate_numeric(df, keys):
     # 1. Select all numeric columns
     numeric_cols = df.select_dtypes(include="number").columns.tolist()
@@ -17,28 +26,131 @@ def aggregate_numeric(df, keys):
     cols_to_sum = [c for c in numeric_cols if c not in keys]
     
     # 3. Group and Sum only the counts
-    return df.groupby(keys, as_index=False)[cols_to_sum].sum()
+    # (observed=True keeps categorical keys from expanding to every combination)
+    return df.groupby(keys, as_index=False, observed=True)[cols_to_sum].sum()
 
-def build_features(enroll, demo, bio):
-    # Standardize Dates
-    enroll = normalize_dates(enroll)
-    demo = normalize_dates(demo)
-    bio = normalize_dates(bio)
+def _fold_partials(partials, keys):
+    # Re-aggregating partial sums gives the same totals as one big groupby
+    combined = pd.concat(partials, ignore_index=True)
+    return combined.groupby(keys, as_index=False, observed=True).sum()
 
-    # The Unique ID Keys
-    keys = ["state", "district", "pincode", "year", "month"]
-    
-    # Aggregation (Now Safe)
-    enroll_agg = aggregate_numeric(enroll, keys)
-    demo_agg = aggregate_numeric(demo, keys)
-    bio_agg = aggregate_numeric(bio, keys)
+def aggregate_csv_chunks(path, keys=KEYS, chunksize=500_000, fold_every=8, validator=None):
+    """
+    Streams a CSV in fixed-size chunks and folds each chunk into running
+    group sums, so peak memory follows the number of distinct keys
+    rather than the raw row count. With a validator (a
+    validation.ValidationReport) each chunk loses its rejected rows before
+    it is aggregated, and the reject counts add up in the validator.
+    """
+    partials = []
+    count_cols = None
 
-    # Merge the three datasets
-    df = (
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunk = normalize_dates(chunk)
+        if validator is not None:
+            chunk = validator.apply(chunk)
+        agg = aggregate_numeric(chunk, keys)
+
+        # A column only counts as numeric if every chunk parsed it as numeric,
+        # which is what a whole-file read_csv would have inferred too.
+        chunk_cols = [c for c in agg.columns if c not in keys]
+        if count_cols is None:
+            count_cols = chunk_cols
+        else:
+            count_cols = [c for c in count_cols if c in chunk_cols]
+
+        partials.append(agg)
+        if len(partials) >= fold_every:
+            partials = [_fold_partials([p[keys + count_cols] for p in partials], keys)]
+
+    if not partials:
+        return aggregate_numeric(normalize_dates(pd.read_csv(path, nrows=0)), keys)
+
+    return _fold_partials([p[keys + count_cols] for p in partials], keys)
+
+@instrumented()
+def join_aggregates(enroll_agg, demo_agg, bio_agg, keys=KEYS, join="packed"):
+    """
+    Left-joins demographic and biometric aggregates onto enrollment.
+    join="packed" matches on a single int64 surrogate key (see key_codec);
+    join="merge" is the original two chained DataFrame.merge calls.
+    """
+    if join == "packed":
+        try:
+            return left_join_packed(enroll_agg, [demo_agg, bio_agg], keys)
+        except ValueError as e:
+            print(f" ! Packed join unavailable ({e}); falling back to merge.")
+
+    return (
         enroll_agg
         .merge(demo_agg, on=keys, how="left")
         .merge(bio_agg, on=keys, how="left")
-    ).fillna(0)
+    )
+
+# Region columns a dormancy threshold is taken over
+DORMANCY_GROUPS = {
+    "national": None,
+    "state": ["state"],
+    "district": ["state", "district"],
+}
+
+def dormancy_threshold(df, by="national", method="exact", sketch=None):
+    """
+    "High population" = top quartile of total enrolment, nationally or
+    within each state / district (by). method="sketch" reads the quartile
+    off a QuantileSketch (built from df unless a merged one is passed)
+    instead of sorting the column. Per-region thresholds come back as one
+    value per row of df.
+    """
+    cols = DORMANCY_GROUPS[by]
+    if method == "exact":
+        if cols is None:
+            return df["total_enrolment"].quantile(0.75)
+        return df.groupby(cols, observed=True)["total_enrolment"].transform("quantile", 0.75)
+    if method != "sketch":
+        raise ValueError(f"Unknown dormancy method '{method}'; expected 'exact' or 'sketch'.")
+
+    if sketch is None:
+        sketch = sketch_column(df, "total_enrolment", cols)
+    thresholds = sketch.quantiles(0.75)
+    if cols is None:
+        return thresholds[ALL]
+    return pd.Series(group_labels(df, cols), index=df.index).map(thresholds)
+
+def flag_dormancy(df, threshold=None, by="national", method="exact"):
+    """
+    Sets is_dormant for high-population keys with zero biometric updates.
+    threshold defaults to dormancy_threshold(df, by, method); pass it
+    explicitly when df is only one shard of the data.
+    """
+    if threshold is None:
+        threshold = dormancy_threshold(df, by, method)
+    total_bio = df.get("bio_age_5_17", 0) + df.get("bio_age_17_", 0)
+    
+    df["is_dormant"] = np.where(
+        (df["total_enrolment"] > threshold) & (total_bio == 0), 
+        1, 0
+    )
+    return df
+
+def engineer_features(enroll_agg, demo_agg, bio_agg, keys=KEYS, compact=False, float32=False,
+                      join="packed", flag_dormant=True, dormancy_by="national", dormancy_method="exact"):
+    """
+    Joins the three aggregated sources and derives the vitality metrics.
+    With compact=True the merged frame is narrowed once its missing counts
+    are filled with 0 (see schema.compact_frame) and the new feature
+    columns follow suit.
+    flag_dormant=False leaves out is_dormant, whose threshold is global;
+    dormancy_by / dormancy_method are passed on to dormancy_threshold.
+    """
+    # Merge the three datasets
+    df = join_aggregates(enroll_agg, demo_agg, bio_agg, keys, join)
+    # Only the counts: categorical keys can't take 0 as a value on pandas 2.x
+    cols = [c for c in df.columns if c not in keys]
+    df[cols] = df[cols].fillna(0)
+
+    if compact:
+        df = compact_frame(df, float32, keys)
 
     # --- Feature Engineering ---
 
@@ -61,12 +173,52 @@ def build_features(enroll, demo, bio):
     df["mbu_velocity"] = child_updates / (target_cohort + 1)
 
     # 4. Dormancy Flag
-    high_pop_threshold = df["total_enrolment"].quantile(0.75)
-    total_bio = df.get("bio_age_5_17", 0) + df.get("bio_age_17_", 0)
-    
-    df["is_dormant"] = np.where(
-        (df["total_enrolment"] > high_pop_threshold) & (total_bio == 0), 
-        1, 0
-    )
+    if flag_dormant:
+        df = flag_dormancy(df, by=dormancy_by, method=dormancy_method)
+
+    if compact:
+        df = compact_frame(df, float32, keys)
+
+    return df
+
+def build_features(enroll, demo, bio, normalized=False, compact=False, float32=False,
+                   join="packed", flag_dormant=True, dormancy_by="national", dormancy_method="exact"):
+    # Standardize Dates (skipped when the frames come pre-normalized, e.g. from the cache)
+    if not normalized:
+        enroll = normalize_dates(enroll)
+        demo = normalize_dates(demo)
+        bio = normalize_dates(bio)
+
+    # Compact Schema (categorical state/district, narrow ints)
+    if compact:
+        enroll, demo, bio = compact_inputs([enroll, demo, bio], KEYS)
+
+    # Aggregation (Now Safe)
+    enroll_agg = aggregate_numeric(enroll, KEYS)
+    demo_agg = aggregate_numeric(demo, KEYS)
+    bio_agg = aggregate_numeric(bio, KEYS)
+
+    return engineer_features(enroll_agg, demo_agg, bio_agg, KEYS, compact, float32, join, flag_dormant,
+                             dormancy_by, dormancy_method)
+
+def build_features_streaming(enroll_path, demo_path, bio_path, chunksize=500_000,
+                             compact=False, float32=False, join="packed",
+                             dormancy_by="national", dormancy_method="exact", validators=None):
+    """
+    Same output as build_features, but reads each CSV in chunks instead of
+    holding the three raw frames in memory. validators, if given, holds one
+    ValidationReport per source and filters its chunks (see
+    aggregate_csv_chunks).
+    """
+    validators = validators or (None, None, None)
+    enroll_agg, demo_agg, bio_agg = [
+        aggregate_csv_chunks(path, KEYS, chunksize, validator=validator)
+        for path, validator in zip((enroll_path, demo_path, bio_path), validators)
+    ]
+
+    # Chunks can't share categories up front, so compact the (much smaller) aggregates
+    if compact:
+        enroll_agg, demo_agg, bio_agg = compact_inputs([enroll_agg, demo_agg, bio_agg], KEYS)
 
-    return df
\ No newline at end of file
+    return engineer_features(enroll_agg, demo_agg, bio_agg, KEYS, compact, float32, join,
+                             dormancy_by=dormancy_by, dormancy_method=dormancy_method)
@@ -1,6 +1,6 @@
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+import sys
+from comparison import load_scored, summarize_districts
+from rendering import pyplot, seaborn, save_figure, render_figures
 #adding random comment to push it again 
 
 #New comment, same job, testing webhook handler nothing else
@@ -8,35 +8,75 @@ import matplotlib.pyplot as plt
 # test 4
 
 # Test 5
-def generate_district_comparison(indore_path, dindori_path):
+
+# The original Urban vs. Rural pair
+DEFAULT_DISTRICTS = ['Indore', 'Dindori']
+DEFAULT_LABELS = {'Indore': 'Indore (Urban)', 'Dindori': 'Dindori (Rural)'}
+PAIR_COLORS = ['#3498db', '#e74c3c']
+
+def district_palette(labels):
+    """
+    Blue/red for a head-to-head pair, a qualitative palette beyond that.
+    """
+    labels = list(labels)
+    if len(labels) <= len(PAIR_COLORS):
+        return dict(zip(labels, PAIR_COLORS))
+    return dict(zip(labels, seaborn().color_palette("husl", len(labels))))
+
+def _themed():
+    # Set a professional theme (in whichever process draws the figure)
+    plt, sns = pyplot(), seaborn()
+    sns.set_theme(style="whitegrid")
+    return plt, sns
+
+def generate_district_comparison(districts=DEFAULT_DISTRICTS, labels=DEFAULT_LABELS, summary=None, workers=None):
     """
     Generates high-contrast visualizations to compare Urban vs. Rural performance
     across MBU, Drift, and AIHS metrics.
+
+    districts is any list of district names or "all"; labels optionally maps
+    a district name to its legend label. All three charts are drawn from the
+    per-district aggregates of comparison.summarize_districts, and
+    rendered side by side (rendering.render_figures, workers processes).
     """
-    # 1. Load Datasets
-    try:
-        df_indore = pd.read_csv(indore_path)
-        df_dindori = pd.read_csv(dindori_path)
-    except FileNotFoundError:
-        print("Error: Files not found. Please ensure input CSVs exist.")
+    # 1. Load & Summarize (one grouped pass over the national output)
+    if summary is None:
+        try:
+            summary = summarize_districts(load_scored(districts=districts), districts)
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return
+    for name in summary["missing"]:
+        print(f" ! No rows for {name}; left out of the comparison.")
+    if summary["means"].empty:
+        print("Error: None of the requested districts are in the pipeline output.")
         return
 
-    # 2. Tag and Combine
-    df_indore['District_Type'] = 'Indore (Urban)'
-    df_dindori['District_Type'] = 'Dindori (Rural)'
+    # 2. Tag with display labels
+    labels = {k.lower(): v for k, v in (labels or {}).items()}
+    means = summary["means"].rename(index=lambda d: labels.get(d.lower(), d)).rename_axis('District_Type')
+    box = {labels.get(d.lower(), d): stats for d, stats in summary["box"].items()}
+    palette = district_palette(means.index)
     
     # Select only relevant columns for the "Head-to-Head"
-    cols = ['District_Type', 'score_mbu', 'score_drift', 'AIHS']
-    df_combined = pd.concat([df_indore[cols], df_dindori[cols]], ignore_index=True)
+    cols = ['score_mbu', 'score_drift', 'AIHS']
+    df_combined = means[cols].reset_index()
 
-    # Set a professional theme
-    sns.set_theme(style="whitegrid")
+    render_figures([
+        (plot_scorecard, (df_combined, palette), {}),
+        (plot_strategy_map, (df_combined, palette), {}),
+        (plot_consistency_box, (df_combined, box, palette), {}),
+    ], workers=workers)
+
+def plot_scorecard(df_combined, palette):
+    plt, sns = _themed()
+    n_districts = len(df_combined)
 
     # --- VISUALIZATION 1: The "Scorecard" (Grouped Bar Chart) ---
     # Best for: Comparing the raw averages side-by-side
     plt.figure(figsize=(10, 6))
     
-    # Melt data for grouped bar format
+    # Melt data for grouped bar format (already one mean per district and metric)
     df_melted = df_combined.melt(id_vars='District_Type', var_name='Metric', value_name='Score')
     
     # Plot
@@ -45,25 +85,33 @@ def generate_district_comparison(indore_path, dindori_path):
         x='Metric', 
         y='Score', 
         hue='District_Type', 
-        palette={'Indore (Urban)': '#3498db', 'Dindori (Rural)': '#e74c3c'},
+        palette=palette,
         errorbar=None  # Remove error bars for cleaner look
     )
     
-    # Annotate values on top of bars
-    for container in ax.containers:
-        ax.bar_label(container, fmt='%.1f', padding=3, fontsize=10, fontweight='bold')  # type: ignore
+    # Annotate values on top of bars (only while they stay readable)
+    if n_districts <= 8:
+        for container in ax.containers:
+            ax.bar_label(container, fmt='%.1f', padding=3, fontsize=10, fontweight='bold')  # type: ignore
 
     plt.title("The Welfare-Compliance Paradox: Rural vs. Urban Performance", fontsize=14, fontweight='bold')
     plt.ylim(0, 110)
     plt.ylabel("Index Score (0-100)")
     plt.xlabel("")
-    plt.legend(title="Region")
+    if n_districts <= 12:
+        plt.legend(title="Region")
+    else:
+        plt.legend().remove()
     plt.tight_layout()
-    plt.savefig('output/comparison_bar_chart.png')
-    print("Generated: output/comparison_bar_chart.png")
+    save_figure('output/comparison_bar_chart.png')
+
+def plot_strategy_map(df_combined, palette):
+    plt, sns = _themed()
+    n_districts = len(df_combined)
 
     # --- VISUALIZATION 2: The "Strategy Map" (Scatter Plot) ---
     # Best for: Showing the trade-off between Integrity (Drift) and Efficiency (MBU)
+    # One point per district (its mean position)
     plt.figure(figsize=(10, 7))
     
     sns.scatterplot(
@@ -71,8 +119,9 @@ def generate_district_comparison(indore_path, dindori_path):
         x='score_drift', 
         y='score_mbu', 
         hue='District_Type', 
-        style='District_Type',
-        palette={'Indore (Urban)': '#3498db', 'Dindori (Rural)': '#e74c3c'},
+        style='District_Type' if n_districts <= 12 else None,
+        palette=palette,
+        legend=n_districts <= 12,
         s=100, 
         alpha=0.6,
         edgecolor='w'
@@ -85,32 +134,36 @@ def generate_district_comparison(indore_path, dindori_path):
     plt.axhline(y=80, color='gray', linestyle='--', alpha=0.5, label='High Efficiency Zone')
     plt.legend(loc='lower right')
     plt.tight_layout()
-    plt.savefig('output/comparison_scatter_strategy.png')
-    print("Generated: output/comparison_scatter_strategy.png")
+    save_figure('output/comparison_scatter_strategy.png')
+
+def plot_consistency_box(df_combined, box, palette):
+    plt, sns = _themed()
+    n_districts = len(df_combined)
 
     # --- VISUALIZATION 3: Consistency Check (Box Plot) ---
     # Best for: Showing if the performance is consistent or varies wildly
-    plt.figure(figsize=(8, 6))
+    # Drawn from precomputed quantiles (whiskers at the 5th/95th percentile)
+    plt.figure(figsize=(max(8, 0.4 * n_districts), 6))
     
-    sns.boxplot(
-        data=df_combined, 
-        x='District_Type', 
-        y='AIHS', 
-        palette={'Indore (Urban)': '#3498db', 'Dindori (Rural)': '#e74c3c'},
-        width=0.5
-    )
+    order = df_combined['District_Type']
+    stats = [dict(box[label]['AIHS'], label=label) for label in order]
+    artists = plt.gca().bxp(stats, widths=0.5, patch_artist=True, showfliers=False)
+    for patch, label in zip(artists['boxes'], order):
+        patch.set_facecolor(palette[label])
+    if n_districts > 12:
+        plt.xticks(rotation=90, fontsize=6)
     
     plt.title("Consistency of Service Delivery (AIHS Distribution)", fontsize=14, fontweight='bold')
     plt.ylabel("Overall Identity Health Score")
     plt.xlabel("")
     plt.tight_layout()
-    plt.savefig('output/comparison_consistency_box.png')
-    print("Generated: output/comparison_consistency_box.png")
+    save_figure('output/comparison_consistency_box.png')
 
 # --- EXECUTION BLOCK ---
 if __name__ == "__main__":
-    # Ensure you are pointing to the correct files
-    generate_district_comparison(
-        indore_path='data/output/indore/aadhaar_pulse_analysis_indore.csv', 
-        dindori_path='data/output/dindori/aadhaar_pulse_analysis_dindori.csv'
-    )
\ No newline at end of file
+    # python generate_comparison_plots.py [all | District1 District2 ...]
+    args = sys.argv[1:]
+    if args == ["all"]:
+        generate_district_comparison("all")
+    else:
+        generate_district_comparison(args or DEFAULT_DISTRICTS)
\ No newline at end of file
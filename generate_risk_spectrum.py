@@ -1,61 +1,42 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.colors as mcolors
-import os
+import sys
+from comparison import load_scored, summarize_districts
+from rendering import pyplot, seaborn, save_figure
 
-def generate_risk_spectrum_chart():
+# The Strategic Archetypes (district names as in the pipeline output)
+ARCHETYPE_DISTRICTS = ["Bangalore", "Indore", "Dindori", "Banaskantha", "Sheopur"]
+
+# Above this many bars, per-bar text would overlap
+MAX_LABELLED_BARS = 60
+
+def generate_risk_spectrum_chart(districts=ARCHETYPE_DISTRICTS, summary=None):
     """
     Generates a Horizontal Bar Chart visualizing the Risk Spectrum 
     from 'Digital Dark Zones' (Red) to 'Resilient Hubs' (Green).
-    """
-    # 1. Define the Strategic Archetypes and their File Paths
-    # Note: Ensure these CSV files are present in your directory
-    districts_config = [
-        {"name": "Bangalore",   "file": "aadhaar_pulse_analysis_bangalore.csv"},
-        {"name": "Indore",      "file": "aadhaar_pulse_analysis_indore.csv"},
-        {"name": "Dindori",     "file": "aadhaar_pulse_analysis_dindori.csv"},
-        {"name": "Banaskantha", "file": "aadhaar_pulse_analysis_banaskantha.csv"},
-        {"name": "Sheopur",     "file": "aadhaar_pulse_analysis_sheopur.csv"}
-    ]
 
-    data = []
-
-    # 2. Load Data and Extract Scores
+    districts is any list of district names or "all"; the mean AIHS of
+    every district comes from one grouped pass (comparison.summarize_districts).
+    """
+    # 1+2. Load Data and Extract Scores
     print("Loading District Data...")
-    for entry in districts_config:
-        file_path = entry["file"]
-        district_name = entry["name"]
-        
-        if os.path.exists(file_path):
-            try:
-                df = pd.read_csv(file_path)
-                # Calculate the Mean AIHS for the district
-                avg_score = df['AIHS'].mean()
-                data.append({"District": district_name, "AIHS": avg_score})
-                print(f" - Loaded {district_name}: Score {avg_score:.1f}")
-            except Exception as e:
-                print(f" ! Error reading {district_name}: {e}")
-        else:
-            # Fallback for demonstration if file is missing (using User's approximate values)
-            print(f" ! File not found: {file_path}. Using approximate value for visualization.")
-            fallback_scores = {
-                "Bangalore": 85.0, 
-                "Indore": 77.4, 
-                "Dindori": 60.0, 
-                "Banaskantha": 45.0, 
-                "Sheopur": 18.2
-            }
-            data.append({"District": district_name, "AIHS": fallback_scores.get(district_name, 0)})
+    if summary is None:
+        summary = summarize_districts(load_scored(districts=districts), districts)
+    for district_name in summary["missing"]:
+        print(f" ! No rows for {district_name}; left out of the chart.")
 
-    # Create DataFrame
-    df_plot = pd.DataFrame(data)
+    df_plot = summary["means"][["AIHS"]].rename_axis("District").reset_index()
+    if df_plot.empty:
+        print("Error: None of the requested districts are in the pipeline output.")
+        return
+    print(f" - Loaded {len(df_plot)} districts")
     
     # 3. Sort Data for the Chart (High Score to Low Score)
     df_plot = df_plot.sort_values(by="AIHS", ascending=False)
 
     # 4. Create the Visualization
-    plt.figure(figsize=(12, 6))
+    plt, sns = pyplot(), seaborn()
+    import matplotlib.colors as mcolors
+    n_bars = len(df_plot)
+    plt.figure(figsize=(12, max(6, 0.2 * n_bars)))
     sns.set_theme(style="whitegrid")
 
     # Define a Custom Color Map (Red -> Yellow -> Green)
@@ -64,7 +45,7 @@ def generate_risk_spectrum_chart():
     
     # Normalize scores to 0-1 for color mapping
     norm = mcolors.Normalize(0, 100)
-    colors = [cmap(norm(val)) for val in df_plot['AIHS']]
+    colors = cmap(norm(df_plot['AIHS'].to_numpy()))
 
     # Plot Horizontal Bars
     bars = plt.barh(df_plot['District'], df_plot['AIHS'], color=colors)
@@ -75,11 +56,13 @@ def generate_risk_spectrum_chart():
     # 5. Formatting & Annotations
     plt.title("National Risk Segmentation: The Identity Vitality Spectrum", fontsize=16, fontweight='bold')
     plt.xlabel("Identity Health Score (AIHS)", fontsize=12)
-    plt.ylabel("District Archetype", fontsize=12)
+    plt.ylabel("District Archetype" if n_bars <= MAX_LABELLED_BARS else f"Districts (n={n_bars})", fontsize=12)
     plt.xlim(0, 100)
+    if n_bars > MAX_LABELLED_BARS:
+        plt.yticks([])
     
     # Add Score Labels to Bars
-    for bar in bars:
+    for bar in (bars if n_bars <= MAX_LABELLED_BARS else []):
         width = bar.get_width()
         plt.text(
             width + 1, 
@@ -95,12 +78,12 @@ def generate_risk_spectrum_chart():
     plt.axvline(x=50, color='orange', linestyle='--', alpha=0.5, label='Maintenance Debt (<50)')
     plt.legend(loc='lower right')
 
-    # Add Descriptive Text for the "Red Zone"
-    red_zone_district = df_plot.iloc[-1]['District']
+    # Add Descriptive Text for the "Red Zone" (the lowest bar)
+    red_zone_score = df_plot.iloc[-1]['AIHS']
     plt.annotate(
         f'CRITICAL RED ZONE\n(Deploy Mobile Vans)', 
-        xy=(18, 4),  # Adjust coordinates based on bar position
-        xytext=(25, 3.5),
+        xy=(red_zone_score + 7, n_bars - 1),  # just past the score label
+        xytext=(red_zone_score + 15, n_bars - 1.5),
         arrowprops=dict(facecolor='red', shrink=0.05),
         fontsize=10, 
         color='#c0392b', 
@@ -109,10 +92,13 @@ def generate_risk_spectrum_chart():
 
     plt.tight_layout()
     output_filename = "output/risk_spectrum_chart.png"
-    os.makedirs("output", exist_ok=True)
-    plt.savefig(output_filename)
-    print(f"\nVisualization saved to: {output_filename}")
-    plt.show()
+    # Saved and closed rather than shown: the Agg backend never blocks on a window
+    save_figure(output_filename)
 
 if __name__ == "__main__":
-    generate_risk_spectrum_chart()
\ No newline at end of file
+    # python generate_risk_spectrum.py [all | District1 District2 ...]
+    args = sys.argv[1:]
+    if args == ["all"]:
+        generate_risk_spectrum_chart("all")
+    else:
+        generate_risk_spectrum_chart(args or ARCHETYPE_DISTRICTS)
\ No newline at end of file
@@ -1,33 +1,41 @@
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+import sys
+from comparison import load_scored, summarize_districts
+from rendering import pyplot, seaborn, save_figure
+from generate_comparison_plots import DEFAULT_DISTRICTS, DEFAULT_LABELS, district_palette
 
-def generate_temporal_comparison(indore_path, dindori_path):
+def generate_temporal_comparison(districts=DEFAULT_DISTRICTS, labels=DEFAULT_LABELS, summary=None):
     """
     Generates a Time-Series comparison to visualize the 'Pulse' vs. 'Season' effect.
+
+    districts is any list of district names or "all"; the per-period means
+    come from comparison.summarize_districts.
     """
-    # 1. Load Datasets
-    try:
-        df_indore = pd.read_csv(indore_path)
-        df_dindori = pd.read_csv(dindori_path)
-    except FileNotFoundError:
-        print("Error: Files not found.")
+    # 1. Load & Summarize (one grouped pass over the national output)
+    if summary is None:
+        try:
+            summary = summarize_districts(load_scored(districts=districts), districts)
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return
+    for name in summary["missing"]:
+        print(f" ! No rows for {name}; left out of the comparison.")
+    if summary["series"].empty:
+        print("Error: None of the requested districts are in the pipeline output.")
         return
 
     # 2. Pre-processing
-    # Filter for the relevant timeline (e.g., 2025) to zoom in on the pattern
-    # Assuming 'period' format is 'YYYY-MM'
-    df_indore = df_indore.sort_values('period')
-    df_dindori = df_dindori.sort_values('period')
-
-    df_indore['District_Type'] = 'Indore (Urban)'
-    df_dindori['District_Type'] = 'Dindori (Rural)'
-
-    # Combine
-    cols = ['period', 'AIHS', 'District_Type']
-    df_combined = pd.concat([df_indore[cols], df_dindori[cols]],ignore_index=True)
+    # The series is already one mean AIHS per (period, district), in period order
+    labels = {k.lower(): v for k, v in (labels or {}).items()}
+    series = summary["series"].rename(columns=lambda d: labels.get(d.lower(), d))
+    df_combined = (
+        series.rename_axis('period').reset_index()
+        .melt(id_vars='period', var_name='District_Type', value_name='AIHS')
+        .dropna(subset=['AIHS'])
+    )
+    n_districts = series.shape[1]
 
     # 3. Visualization: The "Heartbeat" Chart
+    plt, sns = pyplot(), seaborn()
     plt.figure(figsize=(12, 6))
     sns.set_theme(style="whitegrid")
 
@@ -37,11 +45,12 @@ def generate_temporal_comparison(indore_path, dindori_path):
         x='period', 
         y='AIHS', 
         hue='District_Type', 
-        style='District_Type',
-        markers=True, 
+        style='District_Type' if n_districts <= 12 else None,
+        markers=n_districts <= 12, 
         dashes=False,
-        linewidth=2.5,
-        palette={'Indore (Urban)': '#3498db', 'Dindori (Rural)': '#e74c3c'}
+        linewidth=2.5 if n_districts <= 12 else 0.8,
+        palette=district_palette(series.columns),
+        legend=n_districts <= 12
     )
 
     # 4. Formatting for Impact
@@ -50,7 +59,8 @@ def generate_temporal_comparison(indore_path, dindori_path):
     plt.xlabel("Timeline (2025-26)")
     plt.xticks(rotation=45)
     plt.ylim(0, 100)
-    plt.legend(title="Region")
+    if n_districts <= 12:
+        plt.legend(title="Region")
     plt.grid(True, linestyle='--', alpha=0.5)
 
     # 5. Annotation (The "Proof")
@@ -64,11 +74,12 @@ def generate_temporal_comparison(indore_path, dindori_path):
     #              color='#e74c3c', fontweight='bold')
 
     plt.tight_layout()
-    plt.savefig('output/temporal_comparison.png')
-    print("Generated: output/temporal_comparison.png")
+    save_figure('output/temporal_comparison.png')
 
 if __name__ == "__main__":
-    generate_temporal_comparison(
-        indore_path='data/output/indore/aadhaar_pulse_analysis_indore.csv', 
-        dindori_path='data/output/dindori/aadhaar_pulse_analysis_dindori.csv'
-    )
\ No newline at end of file
+    # python generate_temporal_comparison.py [all | District1 District2 ...]
+    args = sys.argv[1:]
+    if args == ["all"]:
+        generate_temporal_comparison("all")
+    else:
+        generate_temporal_comparison(args or DEFAULT_DISTRICTS)
\ No newline at end of file
@@ -0,0 +1,156 @@
+import os
+import numpy as np
+import pandas as pd
+from feature_engineering import KEYS, DORMANCY_GROUPS, normalize_dates, aggregate_numeric, engineer_features, flag_dormancy, build_features
+from key_codec import build_codec, encode_keys
+from ml_pipeline import run_analytical_pipeline, load_models, predict_risk_clusters
+from scoring import compute_aihs
+
+STATE_DIR = "state"
+SOURCES = ("enroll", "demo", "bio")
+
+# Columns that are a pure function of the input rows. risk_cluster is not:
+# it depends on which fitted model assigned it.
+DETERMINISTIC_COLUMNS = ["total_enrolment", "drift_ratio", "mbu_velocity", "is_dormant",
+                         "score_mbu", "score_drift", "AIHS"]
+
+def _state_path(state_dir, name):
+    return os.path.join(state_dir, f"{name}.parquet")
+
+def has_state(state_dir=STATE_DIR):
+    return all(os.path.exists(_state_path(state_dir, n)) for n in SOURCES + ("scored",))
+
+def load_state(state_dir=STATE_DIR):
+    return {n: pd.read_parquet(_state_path(state_dir, n)) for n in SOURCES + ("scored",)}
+
+def save_state(state, state_dir=STATE_DIR):
+    os.makedirs(state_dir, exist_ok=True)
+    for name, df in state.items():
+        tmp_path = _state_path(state_dir, name) + ".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, _state_path(state_dir, name))
+
+def aggregate_sources(enroll, demo, bio, normalized=False):
+    """
+    Per-key sums of each source (None passes through for a missing source).
+    """
+    aggs = []
+    for df in (enroll, demo, bio):
+        if df is None:
+            aggs.append(None)
+            continue
+        if not normalized:
+            df = normalize_dates(df)
+        aggs.append(aggregate_numeric(df, KEYS))
+    return aggs
+
+def _assign_clusters(df, model_dir):
+    scaler, kmeans = load_models(model_dir)
+    return predict_risk_clusters(df, scaler, kmeans)
+
+def _reflag_dormancy(df, columns, dormancy_by="national", dormancy_method="exact"):
+    # The threshold is a quantile over every key, so it is refreshed on the
+    # whole stored frame. That is one vectorized pass, no re-aggregation.
+    df = df.drop(columns="is_dormant", errors="ignore")
+    needed = [c for c in ("total_enrolment", "bio_age_5_17", "bio_age_17_") if c in df.columns]
+    needed = (DORMANCY_GROUPS[dormancy_by] or []) + needed
+    df["is_dormant"] = flag_dormancy(df[needed].copy(), by=dormancy_by, method=dormancy_method)["is_dormant"]
+    return df[columns]
+
+def full_rebuild(enroll, demo, bio, state_dir=STATE_DIR, normalized=False, model_dir="models",
+                 dormancy_by="national", dormancy_method="exact"):
+    """
+    Aggregates, scores and clusters the full history, then stores the
+    per-source aggregates and scored output as the base for apply_delta.
+    """
+    enroll_agg, demo_agg, bio_agg = aggregate_sources(enroll, demo, bio, normalized)
+    df_features = engineer_features(enroll_agg, demo_agg, bio_agg, KEYS,
+                                    dormancy_by=dormancy_by, dormancy_method=dormancy_method)
+    df_scored, _ = run_analytical_pipeline(df_features, model_dir=model_dir)
+
+    save_state({"enroll": enroll_agg, "demo": demo_agg, "bio": bio_agg, "scored": df_scored}, state_dir)
+    return df_scored
+
+def apply_delta(enroll_new, demo_new, bio_new, state_dir=STATE_DIR, model_dir="models", normalized=False,
+                dormancy_by="national", dormancy_method="exact"):
+    """
+    Folds a batch of new rows into the stored state.
+
+    Only the keys the new rows touch get their features, scores and
+    risk_cluster recomputed; clusters come from the persisted scaler and
+    KMeans, so untouched rows keep their labels. is_dormant is refreshed
+    everywhere because its threshold is global.
+    """
+    state = load_state(state_dir)
+    new_aggs = aggregate_sources(enroll_new, demo_new, bio_new, normalized)
+
+    # 1. Add the new sums onto the stored per-key sums
+    aggs = []
+    for name, new in zip(SOURCES, new_aggs):
+        if new is None or new.empty:
+            aggs.append(state[name])
+        else:
+            aggs.append(aggregate_numeric(pd.concat([state[name], new], ignore_index=True), KEYS))
+
+    # 2. Keys touched by this batch, as packed int64 keys
+    codec = build_codec(aggs + [state["scored"]], KEYS)
+    touched = np.unique(np.concatenate(
+        [encode_keys(new, codec) for new in new_aggs if new is not None] + [np.zeros(0, np.int64)]
+    ))
+    subsets = [agg[np.isin(encode_keys(agg, codec), touched)] for agg in aggs]
+
+    # 3. Recompute features and scores for those keys only
+    delta = compute_aihs(engineer_features(*subsets, KEYS, flag_dormant=False))
+    delta["risk_cluster"] = _assign_clusters(delta, model_dir)
+
+    # 4. Upsert into the stored output
+    scored = state["scored"]
+    keep = ~np.isin(encode_keys(scored, codec), touched)
+    updated = pd.concat([scored[keep].drop(columns="is_dormant"), delta], ignore_index=True)
+    updated = updated.sort_values(KEYS, kind="stable", ignore_index=True)
+    updated = _reflag_dormancy(updated, list(scored.columns), dormancy_by, dormancy_method)
+
+    save_state({"enroll": aggs[0], "demo": aggs[1], "bio": aggs[2], "scored": updated}, state_dir)
+    print(f" - Delta touched {len(touched)} keys; {len(updated)} rows stored")
+    return updated
+
+def verify_against_full(enroll, demo, bio, state_dir=STATE_DIR, model_dir="models", normalized=False,
+                        dormancy_by="national", dormancy_method="exact"):
+    """
+    Compares the stored (incrementally updated) output with a from-scratch
+    build over the full history. Deterministic columns must match; for
+    risk_cluster we report agreement with the persisted model's labels,
+    since a full rebuild would refit KMeans.
+    """
+    stored = load_state(state_dir)["scored"]
+    full = compute_aihs(build_features(enroll, demo, bio, normalized=normalized,
+                                       dormancy_by=dormancy_by, dormancy_method=dormancy_method))
+
+    codec = build_codec([stored, full], KEYS)
+    stored_key = encode_keys(stored, codec)
+    full_key = encode_keys(full, codec)
+
+    report = {
+        "rows_full": len(full),
+        "rows_stored": len(stored),
+        "missing_keys": int((~np.isin(full_key, stored_key)).sum()),
+        "extra_keys": int((~np.isin(stored_key, full_key)).sum()),
+        "max_abs_diff": {},
+    }
+
+    # Line both frames up on the shared keys
+    common, s_idx, f_idx = np.intersect1d(stored_key, full_key, return_indices=True)
+    for col in DETERMINISTIC_COLUMNS:
+        diff = np.abs(stored[col].to_numpy(float)[s_idx] - full[col].to_numpy(float)[f_idx])
+        report["max_abs_diff"][col] = float(diff.max()) if len(diff) else 0.0
+
+    predicted = _assign_clusters(full.iloc[f_idx], model_dir)
+    stored_clusters = stored["risk_cluster"].to_numpy()[s_idx]
+    report["cluster_agreement"] = float((predicted == stored_clusters).mean()) if len(common) else 1.0
+
+    report["ok"] = (
+        report["missing_keys"] == 0
+        and report["extra_keys"] == 0
+        and all(d <= 1e-9 for d in report["max_abs_diff"].values())
+    )
+    return report
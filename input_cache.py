@@ -0,0 +1,148 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from feature_engineering import normalize_dates
+from instrumentation import instrumented, in_current_stage
+
+CACHE_DIR = "cache"
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+# Bump this whenever normalize_dates (or read_source) changes what it
+# produces, so stale cache entries are never reused.
+CACHE_VERSION = 2
+
+# Raw columns build_features reads, per source file (by file stem), with
+# their dtypes so the parser never has to infer them. The date is kept as
+# text; normalize_dates parses it day-first.
+BASE_DTYPES = {"date": str, "state": str, "district": str, "pincode": "int64"}
+SOURCE_COLUMNS = {
+    "enrollment": ["age_0_5", "age_5_17", "age_18_greater"],
+    "demographic": ["demo_age_5_17", "demo_age_17_"],
+    "biometric": ["bio_age_5_17", "bio_age_17_"],
+}
+
+def file_digest(path, block_size=1 << 20):
+    """
+    SHA-256 of the file contents, read in blocks.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _cache_path(path, digest, cache_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}-v{CACHE_VERSION}-{digest[:20]}.parquet")
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, keep=None):
+    """
+    Deletes the least recently used entries until the cache fits in max_bytes.
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".parquet"):
+            continue
+        full = os.path.join(cache_dir, name)
+        st = os.stat(full)
+        entries.append((st.st_mtime, st.st_size, full))
+
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    # Oldest first
+    for _, size, full in sorted(entries):
+        if total <= max_bytes:
+            break
+        if full == keep:
+            continue
+        os.remove(full)
+        total -= size
+        removed.append(full)
+    return removed
+
+def source_dtypes(path):
+    """
+    Column -> dtype for a known source file, or None for any other CSV.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if stem not in SOURCE_COLUMNS:
+        return None
+    return {**BASE_DTYPES, **dict.fromkeys(SOURCE_COLUMNS[stem], "int64")}
+
+def read_source(path, engine="pyarrow"):
+    """
+    read_csv limited to the columns build_features uses, with explicit
+    dtypes, on pyarrow's multithreaded parser. Falls back to the C parser
+    without pyarrow, and to plain type inference when a column does not
+    fit its declared dtype (e.g. a blank count).
+    """
+    dtypes = source_dtypes(path)
+    if dtypes is None:
+        return pd.read_csv(path)
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {c: d for c, d in dtypes.items() if c in header}
+
+    usecols = list(dtypes)
+    try:
+        try:
+            return pd.read_csv(path, engine=engine, usecols=usecols, dtype=dtypes)
+        except ImportError as e:
+            print(f" ! {engine} parser unavailable ({e}); using the C parser.")
+            return pd.read_csv(path, usecols=usecols, dtype=dtypes)
+    except (ValueError, TypeError) as e:
+        print(f" ! {path} does not match the declared dtypes ({e}); inferring them instead.")
+        return pd.read_csv(path, usecols=usecols)
+
+@instrumented()
+def load_normalized(path, cache_dir=CACHE_DIR, use_cache=True, max_bytes=MAX_CACHE_BYTES, engine="pyarrow"):
+    """
+    Returns read_source(path) passed through normalize_dates, reusing a
+    Parquet copy from an earlier run when the file contents have not changed.
+    """
+    if not use_cache:
+        return normalize_dates(read_source(path, engine))
+
+    cache_path = _cache_path(path, file_digest(path), cache_dir)
+
+    if os.path.exists(cache_path):
+        # Touch so eviction treats it as recently used
+        os.utime(cache_path)
+        print(f" - Cache hit: {path}")
+        return pd.read_parquet(cache_path)
+
+    df = normalize_dates(read_source(path, engine))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    except ImportError as e:
+        # Parquet needs pyarrow; carry on uncached without it
+        print(f" ! Cache disabled ({e})")
+        return df
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    evict_cache(cache_dir, max_bytes, keep=cache_path)
+    return df
+
+def load_sources(paths, **options):
+    """
+    load_normalized for several files at once, one thread per file (the
+    pyarrow parser and Parquet reads release the GIL). Every missing file
+    is reported in a single FileNotFoundError before anything is read.
+    options are passed on to load_normalized.
+    """
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"missing input files: {', '.join(missing)}")
+
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        load = in_current_stage(lambda p: load_normalized(p, **options))
+        return list(pool.map(load, paths))
@@ -0,0 +1,277 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+import pandas as pd
+
+# None while instrumentation is off; stage() and @instrumented then do nothing
+_RECORDER = None
+
+class _Span:
+    def __init__(self, name, parent, depth):
+        self.name = name
+        self.parent = parent
+        self.depth = depth
+        self.rows_in = None
+        self.mem_in = None
+        self.rows_out = None
+        self.mem_out = None
+        self.child_peak = 0
+
+    def output(self, obj):
+        """
+        Records the row count and memory of what the stage produced.
+        """
+        self.rows_out, self.mem_out = _frame_size(obj)
+        return obj
+
+class _Recorder:
+    def __init__(self, trace_memory, profile_stage):
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profile = None
+        self.profiling = False
+        self.records = []
+        # One span stack per thread; see _thread_stack / in_current_stage
+        self.local = threading.local()
+        self.t0 = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+def _frame_size(obj):
+    # Shallow memory_usage: deep=True would scan every string and cost a real pass
+    if isinstance(obj, (list, tuple)):
+        sizes = [_frame_size(o) for o in obj if isinstance(o, (pd.DataFrame, pd.Series))]
+        if not sizes:
+            return None, None
+        return sum(r for r, _ in sizes), sum(m for _, m in sizes)
+    if isinstance(obj, pd.DataFrame):
+        return len(obj), int(obj.memory_usage(index=True, deep=False).sum())
+    if isinstance(obj, pd.Series):
+        return len(obj), int(obj.memory_usage(index=True, deep=False))
+    return None, None
+
+def _max_rss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def enable(trace_memory=False, profile_stage=None):
+    """
+    Starts recording stages. trace_memory adds tracemalloc peaks (slower);
+    profile_stage names one stage to run under cProfile.
+    """
+    global _RECORDER
+    _RECORDER = _Recorder(trace_memory, profile_stage)
+    return _RECORDER
+
+def disable():
+    """
+    Stops recording and returns the collected records.
+    """
+    global _RECORDER
+    rec, _RECORDER = _RECORDER, None
+    if rec is None:
+        return []
+    if rec.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return rec.records
+
+def worker_init():
+    """
+    ProcessPoolExecutor initializer: forked workers inherit the recorder
+    and tracemalloc, which would only slow them down and record nothing
+    the parent sees.
+    """
+    global _RECORDER
+    _RECORDER = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def is_enabled():
+    return _RECORDER is not None
+
+def _thread_stack(rec):
+    # (stack, span that submitted this thread's work or None)
+    local = rec.local
+    if not hasattr(local, "stack"):
+        local.stack = []
+        local.base = None
+    return local.stack, local.base
+
+def in_current_stage(func):
+    """
+    Wraps func for another thread (e.g. a ThreadPoolExecutor) so the
+    stages it records are children of the stage active where it was
+    wrapped, instead of starting a new root.
+    """
+    rec = _RECORDER
+    if rec is None:
+        return func
+    stack, base = _thread_stack(rec)
+    submitter = stack[-1] if stack else base
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        local = rec.local
+        saved = getattr(local, "stack", None), getattr(local, "base", None)
+        local.stack, local.base = [], submitter
+        try:
+            return func(*args, **kwargs)
+        finally:
+            local.stack, local.base = saved
+    return wrapper
+
+@contextmanager
+def _recorded_stage(rec, name, inputs):
+    stack, base = _thread_stack(rec)
+    parent = stack[-1] if stack else base
+    span = _Span(name, parent.name if parent else None, parent.depth + 1 if parent else 0)
+    if inputs is not None:
+        span.rows_in, span.mem_in = _frame_size(inputs)
+
+    # tracemalloc peaks and cProfile are process-wide, so only main-thread
+    # spans use them; off the main thread CPU time is the thread's own.
+    main = threading.current_thread() is threading.main_thread()
+    trace_memory = rec.trace_memory and main
+    cpu_clock = time.process_time if main else time.thread_time
+
+    if trace_memory:
+        if parent is not None:
+            parent.child_peak = max(parent.child_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    # Every call of the named stage adds to one profile (nested calls are already covered)
+    profiling = main and rec.profile_stage == name and not rec.profiling
+    if profiling:
+        rec.profile = rec.profile or cProfile.Profile()
+        rec.profiling = True
+        rec.profile.enable()
+
+    stack.append(span)
+    rss_before = _max_rss_bytes()
+    start_cpu = cpu_clock()
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        wall = time.perf_counter() - start
+        cpu = cpu_clock() - start_cpu
+        stack.pop()
+        if profiling:
+            rec.profile.disable()
+            rec.profiling = False
+        peak = None
+        if trace_memory:
+            peak = max(span.child_peak, tracemalloc.get_traced_memory()[1])
+            if parent is not None:
+                parent.child_peak = max(parent.child_peak, peak)
+            tracemalloc.reset_peak()
+        rss = _max_rss_bytes()
+        rec.records.append({
+            "stage": name,
+            "parent": span.parent,
+            "depth": span.depth,
+            "start_s": start - rec.t0,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "max_rss_mb": rss / 2 ** 20,
+            "rss_growth_mb": (rss - rss_before) / 2 ** 20,
+            "tracemalloc_peak_mb": None if peak is None else peak / 2 ** 20,
+            "rows_in": span.rows_in,
+            "rows_out": span.rows_out,
+            "mem_in_mb": None if span.mem_in is None else span.mem_in / 2 ** 20,
+            "mem_out_mb": None if span.mem_out is None else span.mem_out / 2 ** 20,
+            "thread": threading.get_ident(),
+        })
+
+class _NullSpan:
+    def output(self, obj):
+        return obj
+
+_NULL_STAGE = nullcontext(_NullSpan())
+
+def stage(name, inputs=None):
+    """
+    Context manager timing one stage; yields a span whose output(df)
+    records the result size. A shared no-op while instrumentation is off.
+
+        with stage("features", inputs=[enroll, demo, bio]) as s:
+            df = s.output(build_features(enroll, demo, bio))
+    """
+    rec = _RECORDER
+    if rec is None:
+        return _NULL_STAGE
+    return _recorded_stage(rec, name, inputs)
+
+def instrumented(name=None):
+    """
+    Decorator recording every call as a stage named after the function.
+    Rows in come from the first DataFrame argument, rows out from the
+    returned frame(s).
+    """
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            rec = _RECORDER
+            if rec is None:
+                return func(*args, **kwargs)
+            first = next((a for a in args if isinstance(a, pd.DataFrame)), None)
+            with _recorded_stage(rec, label, first) as span:
+                return span.output(func(*args, **kwargs))
+        return wrapper
+    return decorate
+
+def write_json(records, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"pid": os.getpid(), "stages": records}, f, indent=2)
+    print(f"Generated: {path}")
+
+def write_chrome_trace(records, path):
+    """
+    Trace Event Format file for chrome://tracing or Perfetto.
+    """
+    events = [{
+        "name": r["stage"],
+        "ph": "X",
+        "ts": r["start_s"] * 1e6,
+        "dur": r["wall_s"] * 1e6,
+        "pid": os.getpid(),
+        "tid": r["thread"],
+        "args": {k: v for k, v in r.items() if k not in ("stage", "start_s", "wall_s", "thread") and v is not None},
+    } for r in records]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"Generated: {path}")
+
+def write_profile(path, top=25):
+    """
+    Saves the cProfile stats of the profiled stage (if it ran) and prints
+    the top entries by cumulative time.
+    """
+    rec = _RECORDER
+    if rec is None or rec.profile is None:
+        print(f"No profile recorded (stage '{rec.profile_stage if rec else None}' did not run).")
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rec.profile.dump_stats(path)
+    pstats.Stats(path).sort_stats("cumulative").print_stats(top)
+    print(f"Generated: {path}")
+    return path
+
+def summary(records):
+    """
+    Records as a table, one row per stage call in completion order.
+    """
+    cols = ["stage", "parent", "wall_s", "cpu_s", "max_rss_mb", "tracemalloc_peak_mb", "rows_in", "rows_out", "mem_out_mb"]
+    return pd.DataFrame(records, columns=list(records[0]) if records else cols)[cols]
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+def _is_label_column(s):
+    return isinstance(s.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(s.dtype)
+
+def _label_codes(series):
+    """
+    Sorted union of the labels in a list of series, and each series' codes
+    into it (-1 for missing), from one factorize over all of them.
+    """
+    if all(isinstance(s.dtype, pd.CategoricalDtype) for s in series):
+        # Only the (few) categories need matching up
+        categories = series[0].cat.categories
+        for s in series[1:]:
+            if not s.cat.categories.equals(categories):
+                categories = categories.union(s.cat.categories)
+        categories = categories.sort_values()
+        codes = []
+        for s in series:
+            local = s.cat.codes.to_numpy()
+            codes.append(np.where(local < 0, -1, categories.get_indexer(s.cat.categories)[local]))
+        return categories, codes
+
+    values = np.concatenate([s.to_numpy(dtype=object) for s in series])
+    all_codes, categories = pd.factorize(values, sort=True)
+    bounds = np.cumsum([len(s) for s in series])[:-1]
+    return pd.Index(categories), np.split(all_codes, bounds)
+
+def _build_fields(frames, keys):
+    # The codec, plus the label codes of every frame found while building it
+    fields, label_codes = [], {}
+    for col in keys:
+        series = [f[col] for f in frames]
+        if _is_label_column(series[0]):
+            categories, label_codes[col] = _label_codes(series)
+            span = max(len(categories) - 1, 0)
+            fields.append({"name": col, "categories": categories, "offset": 0})
+        else:
+            for s in series:
+                if s.dtype.kind == "f" and (s.isna().any() or not np.array_equal(s, np.floor(s))):
+                    raise ValueError(f"Key column '{col}' must hold whole numbers to be packed")
+            non_empty = [s for s in series if len(s)]
+            lo = int(min(s.min() for s in non_empty)) if non_empty else 0
+            hi = int(max(s.max() for s in non_empty)) if non_empty else 0
+            span = hi - lo
+            fields.append({"name": col, "categories": None, "offset": lo})
+        fields[-1]["bits"] = max(span.bit_length(), 1)
+        fields[-1]["dtype"] = series[0].dtype
+
+    total_bits = sum(f["bits"] for f in fields)
+    if total_bits > 63:
+        raise ValueError(f"Keys need {total_bits} bits, more than fit in an int64")
+
+    # Shift for each field, counted from the right-most (last) key
+    shift = 0
+    for field in reversed(fields):
+        field["shift"] = shift
+        shift += field["bits"]
+    return fields, label_codes
+
+def build_codec(frames, keys):
+    """
+    Works out how to pack the key columns of all frames into one int64.
+
+    Label columns (state, district) become codes into a sorted category list
+    shared by every frame; numeric columns (pincode, year, month) are stored
+    as an offset from their minimum. Each field gets just enough bits for its
+    range, laid out in key order, so sorting by the packed key is the same
+    as sorting by the key columns.
+    """
+    return _build_fields(frames, keys)[0]
+
+def pack_frames(frames, keys):
+    """
+    build_codec plus encode_keys for every frame, with each label column
+    hashed once: the codes found while building the codec are packed as-is.
+    Returns (codec, list of packed int64 arrays).
+    """
+    codec, label_codes = _build_fields(frames, keys)
+    packed = [np.zeros(len(f), dtype=np.int64) for f in frames]
+    for field in codec:
+        for i, f in enumerate(frames):
+            if field["categories"] is not None:
+                codes = label_codes[field["name"]][i]
+                if (codes < 0).any():
+                    raise ValueError(f"Missing '{field['name']}' value while packing keys")
+            else:
+                codes = f[field["name"]].to_numpy().astype(np.int64) - field["offset"]
+            packed[i] |= codes.astype(np.int64) << field["shift"]
+    return codec, packed
+
+def encode_keys(df, codec):
+    """
+    Packs the key columns of df into one int64 array.
+    """
+    packed = np.zeros(len(df), dtype=np.int64)
+    for field in codec:
+        s = df[field["name"]]
+        if field["categories"] is not None:
+            # Factorize first so the category lookup only touches distinct labels
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                local_codes, uniques = s.cat.codes.to_numpy(), s.cat.categories
+            else:
+                local_codes, uniques = pd.factorize(s)
+            codes = field["categories"].get_indexer(uniques)[local_codes]
+            if (local_codes < 0).any() or (codes < 0).any():
+                raise ValueError(f"Unknown '{field['name']}' value while packing keys")
+        else:
+            codes = s.to_numpy().astype(np.int64) - field["offset"]
+        packed |= codes.astype(np.int64) << field["shift"]
+    return packed
+
+def decode_keys(packed, codec):
+    """
+    Inverse of encode_keys: rebuilds the key columns with their original dtypes.
+    """
+    packed = np.asarray(packed, dtype=np.int64)
+    out = {}
+    for field in codec:
+        codes = (packed >> field["shift"]) & ((1 << field["bits"]) - 1)
+        if field["categories"] is None:
+            out[field["name"]] = pd.array(codes + field["offset"]).astype(field["dtype"])
+        else:
+            labels = pd.Categorical.from_codes(codes, categories=field["categories"])
+            if isinstance(field["dtype"], pd.CategoricalDtype):
+                out[field["name"]] = labels.set_categories(field["dtype"].categories)
+            else:
+                out[field["name"]] = labels.astype(field["dtype"])
+    return pd.DataFrame(out)
+
+def _align_sorted(left_key, right_key):
+    """
+    Positions of left_key in right_key (sorted merge); -1 where absent.
+    """
+    order = None
+    if len(right_key) > 1 and not (np.diff(right_key) > 0).all():
+        order = np.argsort(right_key, kind="stable")
+        right_key = right_key[order]
+
+    pos = np.searchsorted(right_key, left_key)
+    pos_clipped = np.minimum(pos, max(len(right_key) - 1, 0))
+    found = (pos < len(right_key)) & (right_key[pos_clipped] == left_key) if len(right_key) else np.zeros(len(left_key), bool)
+    if order is not None:
+        pos_clipped = order[pos_clipped]
+    return np.where(found, pos_clipped, -1)
+
+def left_join_packed(left, rights, keys):
+    """
+    Equivalent of left.merge(r1, on=keys, how="left").merge(r2, ...) for
+    frames whose keys are unique (e.g. groupby output), but matched on one
+    packed int64 key instead of hashing five columns; each label column is
+    factorized once across all frames (see pack_frames).
+    """
+    _, (left_key, *right_keys) = pack_frames([left] + list(rights), keys)
+
+    # The left key columns are carried through as-is (decode_keys would rebuild
+    # the same values from left_key, but re-materializing strings is not free)
+    columns = {c: left[c].array for c in left.columns}
+
+    for right, right_key in zip(rights, right_keys):
+        idx = _align_sorted(left_key, right_key)
+        missing = idx < 0
+        for c in right.columns:
+            if c in keys:
+                continue
+            if c in columns:
+                raise ValueError(f"Column '{c}' appears in more than one frame")
+            values = right[c].to_numpy()[np.maximum(idx, 0)] if len(right) else np.empty(len(idx))
+            if missing.any():
+                # Same upcast merge does when rows have no partner
+                values = values.astype(np.float64)
+                values[missing] = np.nan
+            columns[c] = values
+
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(left)))
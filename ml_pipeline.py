@@ -1,19 +1,108 @@
+import json
+import os
 import joblib
+import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from scoring import compute_aihs
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import adjusted_rand_score
+from scoring import compute_aihs, MBU_WEIGHT, DRIFT_WEIGHT
+from instrumentation import instrumented
 
-def run_analytical_pipeline(df):
-    df = df.copy()
+# Clustering features, in the order the scaler was fitted on
+FEATURES = ['score_mbu', 'score_drift', 'total_enrolment']
 
-    # 1. Compute Scores First (Deterministic Logic)
-    df = compute_aihs(df)
-    
-    # 2. Perform Clustering on the Risk Metrics
-    # We cluster on the *Scores* now, as they are cleaner features
-    features = ['score_mbu', 'score_drift', 'total_enrolment']
-    X = df[features].fillna(0)
+MODEL_DIR = "models"
+
+# Bump when the features, their meaning or the model layout change, so stale
+# artifacts are refused instead of silently mislabelling rows.
+# (2: cluster ids are ordered healthiest first, see order_clusters)
+ARTIFACT_VERSION = 2
+
+# Tier names for the default three clusters, in cluster id order
+RISK_TIERS = ["High Performing", "Average/Maintenance", "Critical/Dormant"]
+
+def order_clusters(scaler, kmeans):
+    """
+    Renumbers the clusters in place so that id 0 is the healthiest centroid
+    and the last id the most critical, ranked by the AIHS weighting of
+    score_mbu and score_drift in unscaled units (ties broken by
+    total_enrolment, then the old id). The same data then gives the same
+    risk_cluster meaning on every run. Returns old id -> new id.
+    """
+    centers = pd.DataFrame(scaler.inverse_transform(kmeans.cluster_centers_), columns=FEATURES)
+    health = MBU_WEIGHT * centers["score_mbu"] + DRIFT_WEIGHT * centers["score_drift"]
+    # lexsort: last key is primary; descending health, descending enrolment, ascending id
+    order = np.lexsort((np.arange(len(centers)), -centers["total_enrolment"].to_numpy(), -health.to_numpy()))
+    kmeans.cluster_centers_ = kmeans.cluster_centers_[order]
+    remap = np.empty(len(order), dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    if hasattr(kmeans, "labels_"):
+        kmeans.labels_ = remap[kmeans.labels_]
+    return remap
+
+def risk_tier_names(n_clusters):
+    if n_clusters == len(RISK_TIERS):
+        return list(RISK_TIERS)
+    return [f"Tier {i + 1} of {n_clusters}" for i in range(n_clusters)]
+
+def save_models(scaler, kmeans, model_dir=MODEL_DIR):
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(scaler, os.path.join(model_dir, "scaler.pkl"))
+    joblib.dump(kmeans, os.path.join(model_dir, "kmeans.pkl"))
+    meta = {
+        "artifact_version": ARTIFACT_VERSION,
+        "engine": type(kmeans).__name__,
+        "features": FEATURES,
+        "n_clusters": int(kmeans.n_clusters),
+        "cluster_order": "healthiest first",
+        "risk_tiers": risk_tier_names(int(kmeans.n_clusters)),
+        "sklearn_version": sklearn.__version__,
+    }
+    with open(os.path.join(model_dir, "model_meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+
+def load_models(model_dir=MODEL_DIR):
+    """
+    Loads scaler.pkl / kmeans.pkl and checks they were fitted on FEATURES
+    with the current ARTIFACT_VERSION. Artifacts saved before the metadata
+    file existed are checked on the scaler's feature names only, and get
+    their clusters ordered as they load.
+    """
+    scaler = joblib.load(os.path.join(model_dir, "scaler.pkl"))
+    kmeans = joblib.load(os.path.join(model_dir, "kmeans.pkl"))
+
+    meta_path = os.path.join(model_dir, "model_meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("artifact_version") != ARTIFACT_VERSION:
+            raise ValueError(
+                f"Model artifacts are version {meta.get('artifact_version')}, "
+                f"expected {ARTIFACT_VERSION}. Refit the models."
+            )
+        if meta.get("features") != FEATURES:
+            raise ValueError(f"Models were fitted on {meta.get('features')}, expected {FEATURES}.")
+        if meta.get("sklearn_version") != sklearn.__version__:
+            print(f" ! Models saved with scikit-learn {meta.get('sklearn_version')}, "
+                  f"running {sklearn.__version__}.")
+
+    fitted_on = list(getattr(scaler, "feature_names_in_", FEATURES))
+    if fitted_on != FEATURES or kmeans.cluster_centers_.shape[1] != len(FEATURES):
+        raise ValueError(f"Models were fitted on {fitted_on}, expected {FEATURES}.")
+    if not os.path.exists(meta_path):
+        # Pre-metadata artifacts predate cluster ordering; order them on load
+        order_clusters(scaler, kmeans)
+    return scaler, kmeans
+
+@instrumented()
+def fit_risk_model(df, model_dir=MODEL_DIR, n_clusters=3, random_state=42):
+    """
+    Fits the scaler and KMeans on df's FEATURES, orders the clusters (see
+    order_clusters) and saves them. Returns (scaler, kmeans, labels).
+    """
+    X = df[FEATURES].fillna(0)
 
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
@@ -21,12 +110,113 @@ def run_analytical_pipeline(df):
     # Cluster 0: High Performing
     # Cluster 1: Average/Maintenance
     # Cluster 2: Critical/Dormant
-    kmeans = KMeans(n_clusters=3, random_state=42)
+    # (enforced by order_clusters rather than assumed)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state)
     clusters = kmeans.fit_predict(X_scaled)
-    df["risk_cluster"] = clusters
+    clusters = order_clusters(scaler, kmeans)[clusters]
 
     # Save models
-    joblib.dump(scaler, "models/scaler.pkl")
-    joblib.dump(kmeans, "models/kmeans.pkl")
+    save_models(scaler, kmeans, model_dir)
+    return scaler, kmeans, clusters
+
+def frame_chunks(df, chunk_size=100_000):
+    """
+    Returns a callable giving a fresh iterator over df's FEATURES in chunks,
+    so the streaming fit can make several passes. Anything with the same
+    shape (e.g. a function re-reading Parquet row groups) can be used instead.
+    """
+    def chunks():
+        for start in range(0, len(df), chunk_size):
+            yield df[FEATURES].iloc[start:start + chunk_size].fillna(0)
+    return chunks
+
+@instrumented()
+def fit_risk_model_minibatch(chunks, model_dir=MODEL_DIR, n_clusters=3, n_epochs=3, random_state=42):
+    """
+    Out-of-core alternative to fit_risk_model. chunks() yields feature
+    frames; only one chunk is ever scaled in memory.
+
+    Pass 1 streams StandardScaler.partial_fit, then n_epochs passes stream
+    MiniBatchKMeans.partial_fit on the scaled chunks, and a last pass labels
+    every row with the ordered clusters. Returns (scaler, kmeans, labels).
+    """
+    # 1. Streaming scaler fit
+    scaler = StandardScaler()
+    for chunk in chunks():
+        scaler.partial_fit(chunk)
+
+    # 2. Streaming clustering
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+    for _ in range(n_epochs):
+        for chunk in chunks():
+            if len(chunk) >= n_clusters:
+                kmeans.partial_fit(scaler.transform(chunk))
+
+    # 3. Labelling pass (ids ordered healthiest first)
+    order_clusters(scaler, kmeans)
+    labels = np.concatenate(
+        [kmeans.predict(scaler.transform(chunk)) for chunk in chunks()] + [np.zeros(0, np.int32)]
+    ).astype(np.int32)
+
+    save_models(scaler, kmeans, model_dir)
+    return scaler, kmeans, labels
+
+def compare_with_full_kmeans(df, labels, scaler, kmeans, random_state=42):
+    """
+    How far a streamed model is from full-batch KMeans on the same rows:
+    inertia of each (on the streamed scaler's space) and how well the
+    labelings agree. Needs the feature matrix in memory, so it is meant
+    for validation runs, not production-size data.
+    """
+    X_scaled = scaler.transform(df[FEATURES].fillna(0))
+    full = KMeans(n_clusters=kmeans.n_clusters, random_state=random_state).fit(X_scaled)
+
+    streamed_inertia = float(-kmeans.score(X_scaled))
+    full_inertia = float(full.inertia_)
+    return {
+        "rows": len(df),
+        "inertia_streamed": streamed_inertia,
+        "inertia_full": full_inertia,
+        "inertia_gap_pct": 100 * (streamed_inertia - full_inertia) / full_inertia if full_inertia else 0.0,
+        # Permutation-invariant: 1.0 means the same partition
+        "adjusted_rand_index": float(adjusted_rand_score(full.labels_, labels)),
+    }
+
+@instrumented()
+def predict_risk_clusters(df, scaler, kmeans, batch_size=1_000_000):
+    """
+    Assigns clusters with already-fitted models, batch_size rows at a time
+    so the scaled copy of the features stays bounded.
+    """
+    labels = np.empty(len(df), dtype=np.int32)
+    X = df[FEATURES]
+    for start in range(0, len(df), batch_size):
+        batch = X.iloc[start:start + batch_size].fillna(0)
+        labels[start:start + batch_size] = kmeans.predict(scaler.transform(batch))
+    return labels
+
+def run_analytical_pipeline(df, scored=False, fit=True, model_dir=MODEL_DIR, engine="kmeans",
+                            chunk_size=100_000, n_clusters=3, random_state=42):
+    df = df.copy()
+
+    # 1. Compute Scores First (Deterministic Logic)
+    # (skipped when the shards were already scored in parallel)
+    if not scored:
+        df = compute_aihs(df, copy=False)
+    
+    # 2. Perform Clustering on the Risk Metrics
+    # We cluster on the *Scores* now, as they are cleaner features
+    if fit and engine == "minibatch":
+        # Streamed scaler + MiniBatchKMeans, one chunk in memory at a time
+        scaler, kmeans, clusters = fit_risk_model_minibatch(
+            frame_chunks(df, chunk_size), model_dir, n_clusters, random_state=random_state
+        )
+    elif fit:
+        scaler, kmeans, clusters = fit_risk_model(df, model_dir, n_clusters, random_state)
+    else:
+        # Inference only: reuse the saved models so labels stay stable across runs
+        scaler, kmeans = load_models(model_dir)
+        clusters = predict_risk_clusters(df, scaler, kmeans)
+    df["risk_cluster"] = clusters
 
-    return df, kmeans
\ No newline at end of file
+    return df, kmeans
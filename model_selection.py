@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.cluster import KMeans
+from sklearn.metrics import silhouette_score, davies_bouldin_score
+from ml_pipeline import FEATURES, MODEL_DIR
+from instrumentation import instrumented, worker_init
+
+# Candidate cluster counts and seeds swept by select_n_clusters
+K_RANGE = range(2, 9)
+SEEDS = (42,)
+# Rows the candidates are fitted on, and the (smaller) silhouette sample;
+# silhouette is quadratic in the rows it sees
+FIT_SAMPLE = 200_000
+SILHOUETTE_SAMPLE = 20_000
+STRATIFY_BY = "state"
+
+def stratified_sample(df, n, by=STRATIFY_BY, random_state=0):
+    """
+    About n rows of df, drawn from every value of by in proportion to its
+    size (each value keeps at least one row). All of df when it is smaller.
+    """
+    if len(df) <= n:
+        return df
+    if by is None or by not in df.columns:
+        return df.sample(n=n, random_state=random_state)
+    sizes = df.groupby(by, observed=True).size()
+    take = np.maximum((sizes * n / len(df)).round().astype(int), 1)
+    rng = np.random.default_rng(random_state)
+    codes = df.groupby(by, observed=True).ngroup().to_numpy()
+    # Random key per row, then the take[g] smallest keys of each group g
+    keys = rng.random(len(df))
+    order = np.lexsort((keys, codes))
+    starts = np.searchsorted(codes[order], np.arange(len(sizes)))
+    rank = np.arange(len(df)) - starts[codes[order]]
+    picked = order[rank < take.to_numpy()[codes[order]]]
+    return df.iloc[np.sort(picked)]
+
+def _score_candidate(X_fit, X_eval, k, seed):
+    # One (k, seed) candidate: fit on X_fit, score on the silhouette sample
+    kmeans = KMeans(n_clusters=k, random_state=seed).fit(X_fit)
+    labels = kmeans.predict(X_eval)
+    single = len(np.unique(labels)) < 2
+    return {
+        "n_clusters": k,
+        "seed": seed,
+        "inertia": float(kmeans.inertia_),
+        "inertia_per_row": float(kmeans.inertia_) / len(X_fit),
+        "silhouette": np.nan if single else float(silhouette_score(X_eval, labels)),
+        "davies_bouldin": np.nan if single else float(davies_bouldin_score(X_eval, labels)),
+    }
+
+@instrumented()
+def select_n_clusters(df, k_range=K_RANGE, seeds=SEEDS, fit_sample=FIT_SAMPLE,
+                      silhouette_sample=SILHOUETTE_SAMPLE, stratify_by=STRATIFY_BY,
+                      workers=None, model_dir=MODEL_DIR):
+    """
+    Sweeps every (k, seed) candidate in a process pool. Each is fitted on a
+    stratified sample of fit_sample rows and scored on a smaller stratified
+    sample (silhouette, Davies-Bouldin) plus its inertia. The best candidate
+    has the highest silhouette, ties going to the lower Davies-Bouldin and
+    then the smaller k. The sweep is saved as model_selection.csv in
+    model_dir. Returns (n_clusters, seed, results frame).
+    """
+    fit_rows = stratified_sample(df, fit_sample, stratify_by, random_state=0)
+    eval_rows = stratified_sample(fit_rows, silhouette_sample, stratify_by, random_state=1)
+
+    # Same scaling as fit_risk_model, fitted on the sample
+    scaler = StandardScaler().fit(fit_rows[FEATURES].fillna(0))
+    X_fit = scaler.transform(fit_rows[FEATURES].fillna(0))
+    X_eval = scaler.transform(eval_rows[FEATURES].fillna(0))
+
+    candidates = [(k, seed) for k in k_range for seed in seeds if k < len(X_fit)]
+    workers = min(workers or os.cpu_count(), len(candidates)) or 1
+    print(f" - {len(candidates)} candidates on {len(X_fit):,} rows "
+          f"(silhouette on {len(X_eval):,}) across {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers, initializer=worker_init) as pool:
+        futures = [pool.submit(_score_candidate, X_fit, X_eval, k, seed) for k, seed in candidates]
+        results = pd.DataFrame([f.result() for f in futures])
+
+    ranked = results.assign(_sil=results["silhouette"].fillna(-np.inf)).sort_values(
+        ["_sil", "davies_bouldin", "n_clusters", "seed"], ascending=[False, True, True, True], kind="stable"
+    )
+    best = ranked.iloc[0]
+    results["selected"] = results.index == best.name
+
+    os.makedirs(model_dir, exist_ok=True)
+    results.to_csv(os.path.join(model_dir, "model_selection.csv"), index=False)
+    return int(best["n_clusters"]), int(best["seed"]), results
@@ -0,0 +1,86 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from feature_engineering import KEYS, DORMANCY_GROUPS, build_features, flag_dormancy, dormancy_threshold
+from quantile_sketch import sketch_column
+from schema import align_categories
+from scoring import compute_aihs
+from instrumentation import worker_init
+
+SHARD_COLUMNS = {
+    "state": ["state"],
+    "district": ["state", "district"],
+}
+
+def split_shards(enroll, demo, bio, shard_by="state"):
+    """
+    Partitions the three raw sources by state (or state + district).
+    Every aggregation key contains the shard columns, so no key is ever
+    split across two shards.
+    """
+    cols = SHARD_COLUMNS[shard_by]
+    groups = [
+        dict(list(frame.groupby(cols, sort=False, observed=True)))
+        for frame in (enroll, demo, bio)
+    ]
+    empty = [frame.iloc[:0] for frame in (enroll, demo, bio)]
+
+    # Only enrollment keys survive the left joins, so shard on those
+    shards = []
+    for shard_key in groups[0]:
+        shards.append(tuple(
+            g.get(shard_key, e) for g, e in zip(groups, empty)
+        ))
+    return shards
+
+def _score_shard(enroll, demo, bio, options):
+    # Everything per-key runs here; the dormancy threshold is left to the parent.
+    # In sketch mode the shard also sends back its total_enrolment sketch.
+    df = build_features(enroll, demo, bio, flag_dormant=False, **options)
+    sketch = None
+    if options.get("dormancy_method") == "sketch":
+        sketch = sketch_column(df, "total_enrolment", DORMANCY_GROUPS[options.get("dormancy_by", "national")])
+    return compute_aihs(df), sketch
+
+def build_scored_features_parallel(enroll, demo, bio, workers=None, shard_by="state", **options):
+    """
+    build_features + compute_aihs, run per shard in a process pool.
+
+    The result matches the single-process path row for row: shards are put
+    back in key order and is_dormant is flagged afterwards with the
+    dormancy threshold of the full frame. options are passed on to
+    build_features (normalized, compact, float32, join, dormancy_by,
+    dormancy_method); with dormancy_method="sketch" that threshold comes
+    from the merged shard sketches instead of the concatenated column.
+    """
+    workers = workers or os.cpu_count()
+    shards = split_shards(enroll, demo, bio, shard_by)
+    print(f" - {len(shards)} shards by {shard_by} across {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=worker_init) as pool:
+        futures = [pool.submit(_score_shard, e, d, b, options) for e, d, b in shards]
+        results, sketches = zip(*[f.result() for f in futures])
+    results = list(results)
+
+    if options.get("compact"):
+        results = align_categories(results)
+
+    df = pd.concat(results, ignore_index=True)
+    df = df.sort_values(KEYS, kind="stable", ignore_index=True)
+
+    # Global step: one threshold over all shards, column kept in its usual place
+    by = options.get("dormancy_by", "national")
+    method = options.get("dormancy_method", "exact")
+    needed = [c for c in ("total_enrolment", "bio_age_5_17", "bio_age_17_") if c in df.columns]
+    needed = (DORMANCY_GROUPS[by] or []) + needed
+    threshold = None
+    if method == "sketch":
+        merged = sketches[0]
+        for sketch in sketches[1:]:
+            merged.merge(sketch)
+        threshold = dormancy_threshold(df[needed], by, method, sketch=merged)
+    dormant = flag_dormancy(df[needed].copy(), threshold, by, method)["is_dormant"]
+    if options.get("compact"):
+        dormant = dormant.astype("int8")
+    df.insert(df.columns.get_loc("mbu_velocity") + 1, "is_dormant", dormant)
+    return df
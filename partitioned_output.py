@@ -0,0 +1,73 @@
+import os
+import shutil
+import pandas as pd
+from results_store import add_period
+from instrumentation import instrumented
+
+PARQUET_ROOT = "output/aadhaar_pulse_parquet"
+PARTITION_COLUMNS = ["state", "period"]
+
+@instrumented()
+def write_partitioned(df, root=PARQUET_ROOT):
+    """
+    Writes the scored output as a Parquet dataset partitioned by state and
+    period (state=<name>/period=<YYYY-MM>/...). Any previous dataset at root
+    is replaced.
+    """
+    df = add_period(df)
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    df.to_parquet(root, partition_cols=PARTITION_COLUMNS, index=False)
+    print(f"Generated: {root}/ (partitioned by {', '.join(PARTITION_COLUMNS)})")
+
+def read_partitioned(columns=None, states=None, periods=None, start=None, end=None,
+                     districts=None, root=PARQUET_ROOT):
+    """
+    Loads only the requested columns and partitions, e.g.
+    read_partitioned(["period", "AIHS"], states=["Madhya Pradesh"], start="2025-01").
+
+    state and period filters prune whole directories; district filters are
+    pushed down to the row groups.
+    """
+    if not os.path.exists(root):
+        raise FileNotFoundError(f"No partitioned output at '{root}'. Run run_pipeline.py first.")
+
+    filters = []
+    if states is not None:
+        filters.append(("state", "in", list(states)))
+    if periods is not None:
+        filters.append(("period", "in", list(periods)))
+    if start is not None:
+        filters.append(("period", ">=", start))
+    if end is not None:
+        filters.append(("period", "<=", end))
+    if districts is not None:
+        filters.append(("district", "in", list(districts)))
+
+    df = pd.read_parquet(root, columns=columns, filters=filters or None)
+    # Partition values come back as categoricals; plain strings are easier downstream
+    for col in PARTITION_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df
+
+def load_results(path=PARQUET_ROOT, columns=None):
+    """
+    Scored output from either the partitioned dataset or a CSV export.
+    """
+    if path.endswith(".csv"):
+        return pd.read_csv(path, usecols=columns)
+    return read_partitioned(columns, root=path)
+
+def export_district_csv(district, out_dir="data/output", root=PARQUET_ROOT):
+    """
+    Writes data/output/<district>/aadhaar_pulse_analysis_<district>.csv as a
+    filtered read of the dataset, for tools that still expect those files.
+    """
+    df = read_partitioned(districts=[district], root=root)
+    name = district.lower()
+    os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+    path = os.path.join(out_dir, name, f"aadhaar_pulse_analysis_{name}.csv")
+    df.to_csv(path, index=False)
+    print(f"Generated: {path} ({len(df):,} rows)")
+    return path
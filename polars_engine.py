@@ -0,0 +1,170 @@
+import sys
+import numpy as np
+from feature_engineering import KEYS, DORMANCY_GROUPS, build_features
+from input_cache import source_dtypes, load_sources
+from schema import compact_frame
+from scoring import compute_aihs, MBU_LOG_FACTOR, MBU_CAP, DRIFT_FLOOR, DRIFT_CEILING, MBU_WEIGHT, DRIFT_WEIGHT
+from instrumentation import instrumented
+
+# Day-first layouts normalize_dates meets in the inputs, tried in order
+DATE_FORMATS = ["%d-%m-%Y", "%d/%m/%Y", "%d-%m-%y", "%Y-%m-%d"]
+# Columns compared by check_parity; AIHS is rounded to 2 places on both paths
+PARITY_COLUMNS = ["total_enrolment", "drift_ratio", "mbu_velocity", "is_dormant",
+                  "score_mbu", "score_drift", "AIHS"]
+PARITY_TOLERANCE = 1e-6
+
+def polars():
+    """
+    polars, imported on first use so the pandas paths never need it.
+    """
+    import polars as pl
+    return pl
+
+def _schema(lf):
+    # collect_schema() on current polars, .schema on older releases
+    return lf.collect_schema() if hasattr(lf, "collect_schema") else lf.schema
+
+def scan_source(path):
+    """
+    LazyFrame over one input CSV with the declared dtypes of
+    input_cache.source_dtypes; unused columns are pruned by the planner.
+    """
+    pl = polars()
+    dtypes = source_dtypes(path)
+    if dtypes is None:
+        return pl.scan_csv(path)
+    to_polars = {str: pl.Utf8, "int64": pl.Int64}
+    return pl.scan_csv(path, schema_overrides={c: to_polars[d] for c, d in dtypes.items()})
+
+def normalize_dates_lazy(lf):
+    # Same as normalize_dates: unparseable dates become null and drop out at the group-by
+    pl = polars()
+    date = pl.col("date").cast(pl.Utf8)
+    parsed = pl.coalesce([date.str.strptime(pl.Date, fmt, strict=False) for fmt in DATE_FORMATS])
+    return lf.with_columns(parsed.alias("date")).with_columns(
+        pl.col("date").dt.year().alias("year"),
+        pl.col("date").dt.month().alias("month"),
+    )
+
+def aggregate_lazy(lf, keys=KEYS):
+    """
+    Group sums of every numeric non-key column, like aggregate_numeric.
+    """
+    pl = polars()
+    schema = _schema(lf)
+    counts = [c for c, dtype in schema.items() if c not in keys and dtype.is_numeric()]
+    return (
+        lf.drop_nulls(subset=keys)
+        .group_by(keys)
+        .agg([pl.col(c).sum() for c in counts])
+    )
+
+def features_lazy(enroll, demo, bio, keys=KEYS, dormancy_by="national"):
+    """
+    Join, vitality metrics, dormancy flag and AIHS scoring as one lazy
+    query over three LazyFrames of raw rows. Mirrors engineer_features
+    followed by compute_aihs.
+    """
+    pl = polars()
+    enroll, demo, bio = (aggregate_lazy(normalize_dates_lazy(lf), keys) for lf in (enroll, demo, bio))
+    df = enroll.join(demo, on=keys, how="left").join(bio, on=keys, how="left").fill_null(0)
+
+    def col(name):
+        # Absent count columns count as 0, like df.get(name, 0)
+        return pl.col(name) if name in _schema(df) else pl.lit(0)
+
+    df = df.with_columns(
+        (col("age_0_5") + col("age_5_17") + col("age_18_greater")).alias("total_enrolment"),
+        (col("demo_age_17_") / (col("bio_age_17_") + 1)).cast(pl.Float64).alias("drift_ratio"),
+        (col("bio_age_5_17") / (col("age_5_17") + 1)).cast(pl.Float64).alias("mbu_velocity"),
+    )
+
+    # Dormancy: top quartile of total enrolment (nationally or per region), no bio updates
+    threshold = pl.col("total_enrolment").quantile(0.75, interpolation="linear")
+    if DORMANCY_GROUPS[dormancy_by] is not None:
+        threshold = threshold.over(DORMANCY_GROUPS[dormancy_by])
+    total_bio = col("bio_age_5_17") + col("bio_age_17_")
+    df = df.with_columns(
+        ((pl.col("total_enrolment") > threshold) & (total_bio == 0)).cast(pl.Int64).alias("is_dormant")
+    )
+
+    # AIHS, same steps as scoring.aihs_kernel
+    score_mbu = (pl.col("mbu_velocity").clip(lower_bound=0) + 1).log() * MBU_LOG_FACTOR
+    score_mbu = pl.min_horizontal(score_mbu, pl.lit(MBU_CAP, dtype=pl.Float64))
+    drift = pl.col("drift_ratio").clip(DRIFT_FLOOR, DRIFT_CEILING)
+    score_drift = 100 - (drift - DRIFT_FLOOR) / (DRIFT_CEILING - DRIFT_FLOOR) * 100
+    df = df.with_columns(score_mbu.alias("score_mbu"), score_drift.alias("score_drift"))
+    df = df.with_columns(
+        (pl.col("score_mbu") * MBU_WEIGHT + pl.col("score_drift") * DRIFT_WEIGHT).round(2).alias("AIHS")
+    )
+    return df.sort(keys)
+
+def _collect(lf, streaming):
+    # engine="streaming" on current polars, streaming=True on older releases
+    if not streaming:
+        return lf.collect()
+    try:
+        return lf.collect(engine="streaming")
+    except TypeError:
+        return lf.collect(streaming=True)
+
+@instrumented()
+def build_scored_features_polars(enroll, demo, bio, streaming=True, compact=False, float32=False,
+                                 dormancy_by="national", **_):
+    """
+    build_features + compute_aihs on the Polars engine. enroll / demo / bio
+    are CSV paths (scanned lazily, so parsing is part of the plan) or raw
+    pandas frames. Returns a pandas frame in key order; other
+    build_features options (join, dormancy_method, ...) have no Polars
+    counterpart and are ignored, the dormancy quartile is always exact.
+    """
+    pl = polars()
+    sources = [
+        scan_source(src) if isinstance(src, str) else pl.from_pandas(src).lazy()
+        for src in (enroll, demo, bio)
+    ]
+    df = _collect(features_lazy(*sources, KEYS, dormancy_by), streaming).to_pandas()
+    if compact:
+        df = compact_frame(df, float32, KEYS)
+    return df
+
+def check_parity(enroll_path, demo_path, bio_path, dormancy_by="national", tolerance=PARITY_TOLERANCE):
+    """
+    Runs both engines on the same CSVs and compares them key by key.
+    Returns a report like incremental.verify_against_full.
+    """
+    frames = load_sources([enroll_path, demo_path, bio_path], use_cache=False)
+    expected = compute_aihs(build_features(*frames, normalized=True, dormancy_by=dormancy_by))
+    actual = build_scored_features_polars(enroll_path, demo_path, bio_path, dormancy_by=dormancy_by)
+
+    merged = expected.merge(actual, on=KEYS, how="outer", suffixes=("_pandas", "_polars"), indicator=True)
+    both = merged[merged["_merge"] == "both"]
+    report = {
+        "rows_pandas": len(expected),
+        "rows_polars": len(actual),
+        "missing_keys": int((merged["_merge"] == "left_only").sum()),
+        "extra_keys": int((merged["_merge"] == "right_only").sum()),
+        "max_abs_diff": {},
+    }
+    for c in PARITY_COLUMNS:
+        diff = np.abs(both[f"{c}_pandas"].to_numpy(float) - both[f"{c}_polars"].to_numpy(float))
+        report["max_abs_diff"][c] = float(diff.max()) if len(diff) else 0.0
+    # AIHS rounding can differ by one cent on exact .005 ties
+    report["ok"] = (
+        report["missing_keys"] == 0
+        and report["extra_keys"] == 0
+        and all(d <= (0.01 + tolerance if c == "AIHS" else tolerance)
+                for c, d in report["max_abs_diff"].items())
+    )
+    return report
+
+if __name__ == "__main__":
+    # python polars_engine.py [enrollment.csv demographic.csv biometric.csv]
+    # e.g. on synthetic_data output, to check the Polars engine against pandas
+    paths = sys.argv[1:] or ["data/enrollment.csv", "data/demographic.csv", "data/biometric.csv"]
+    ok = True
+    for by in DORMANCY_GROUPS:
+        report = check_parity(*paths, dormancy_by=by)
+        print(f"dormancy_by={by}: {report}")
+        ok = ok and report["ok"]
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,145 @@
+from math import erf, sqrt
+import numpy as np
+import pandas as pd
+from feature_engineering import KEYS, aggregate_numeric, build_features, dormancy_threshold, flag_dormancy, normalize_dates
+from scoring import compute_aihs
+from instrumentation import instrumented
+
+# Sampling unit: whole pincodes, drawn within each (state, district) stratum.
+# Features are per-key sums, so a sampled pincode keeps all of its rows in
+# all three sources and its features come out exact.
+STRATA = ["state", "district"]
+UNIT = STRATA + ["pincode"]
+PREVIEW_FRACTION = 0.05
+HIGH_DRIFT = 2.0
+Z_95 = 1.96
+ENROLMENT_COUNTS = ["age_0_5", "age_5_17", "age_18_greater"]
+
+def sample_units(enroll, fraction=PREVIEW_FRACTION, seed=0):
+    """
+    Pincodes per stratum in the full data (N) and a stratified random
+    sample of them: ceil(fraction * N) per stratum, at least 2 where the
+    stratum has 2, so every stratum gets a variance estimate.
+    Returns (sampled units, per-stratum N and n).
+    """
+    units = enroll[UNIT].drop_duplicates().reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    codes = units.groupby(STRATA, observed=True).ngroup().to_numpy()
+    order = np.lexsort((rng.random(len(units)), codes))
+
+    population = np.bincount(codes)
+    take = np.minimum(np.maximum(np.ceil(fraction * population), 2), population).astype(np.int64)
+    starts = np.searchsorted(codes[order], np.arange(len(population)))
+    rank = np.arange(len(units)) - starts[codes[order]]
+    sampled = units.iloc[np.sort(order[rank < take[codes[order]]])]
+
+    strata = units.groupby(STRATA, observed=True).size().rename("N").to_frame()
+    strata["n"] = take
+    return sampled, strata
+
+def _keep_units(df, sampled):
+    # Rows whose (state, district, pincode) was drawn
+    index = pd.MultiIndex.from_frame(sampled[UNIT].astype(str))
+    rows = pd.MultiIndex.from_frame(df[UNIT].astype(str))
+    return df[rows.isin(index)]
+
+def stratified_total(per_unit, strata, column, by=None):
+    """
+    Expansion estimate of the population total of per_unit[column] (one row
+    per sampled unit, with the STRATA columns) and its variance, for
+    stratified simple random sampling with the finite population
+    correction. by=None gives (total, variance); a list of STRATA columns
+    gives a frame of both per group.
+    """
+    g = per_unit.groupby(STRATA, observed=True)[column]
+    h = pd.DataFrame({"sum": g.sum(), "var": g.var(ddof=1).fillna(0)}).join(strata)
+    h["total"] = h["N"] / h["n"] * h["sum"]
+    h["variance"] = h["N"] ** 2 * (1 - h["n"] / h["N"]) * h["var"] / h["n"]
+    if by is None:
+        return h["total"].sum(), h["variance"].sum()
+    return h.groupby(level=by, observed=True)[["total", "variance"]].sum()
+
+def full_dormancy_threshold(enroll):
+    """
+    The dormancy quartile of a full run, which is taken over the total
+    enrolment of every enrollment key: one group-by over the enrollment
+    counts, without the demographic / biometric joins.
+    """
+    cols = [c for c in ENROLMENT_COUNTS if c in enroll.columns]
+    totals = aggregate_numeric(enroll[KEYS + cols], KEYS)[cols].sum(axis=1)
+    return dormancy_threshold(pd.DataFrame({"total_enrolment": totals}))
+
+def _interval(estimate, variance, z):
+    half = z * np.sqrt(variance)
+    return estimate, estimate - half, estimate + half
+
+@instrumented()
+def preview_insights(enroll, demo, bio, fraction=PREVIEW_FRACTION, seed=0, z=Z_95, normalized=False, top=5):
+    """
+    The KEY INSIGHTS of run_pipeline from a stratified sample of pincodes:
+    average drift ratio, keys with drift above HIGH_DRIFT, dormant keys and
+    the top districts by high-drift keys, each as (estimate, low, high)
+    with a z-level normal interval. The dormancy quartile comes from the
+    full enrollment data (full_dormancy_threshold), so every sampled key is
+    flagged as in a full run.
+    """
+    if not normalized:
+        enroll, demo, bio = (normalize_dates(df) for df in (enroll, demo, bio))
+    threshold = full_dormancy_threshold(enroll)
+    sampled, strata = sample_units(enroll, fraction, seed)
+    frames = [_keep_units(df, sampled) for df in (enroll, demo, bio)]
+    df = build_features(*frames, normalized=True, flag_dormant=False)
+    df = compute_aihs(flag_dormancy(df, threshold))
+
+    # Per-pincode totals: number of keys, summed drift, high-drift and dormant keys
+    df["keys"] = 1
+    df["high_drift"] = (df["drift_ratio"] > HIGH_DRIFT).astype(int)
+    per_unit = df.groupby(UNIT, observed=True)[["keys", "drift_ratio", "high_drift", "is_dormant"]].sum()
+    # Drawn pincodes left without keys (e.g. only unparseable dates) count as zeros
+    per_unit = per_unit.reindex(pd.MultiIndex.from_frame(sampled[UNIT]), fill_value=0).reset_index()
+
+    # Mean drift is a ratio of two totals; its variance comes from the
+    # linearized residual drift - R * keys
+    drift_total, _ = stratified_total(per_unit, strata, "drift_ratio")
+    key_total, _ = stratified_total(per_unit, strata, "keys")
+    ratio = drift_total / key_total
+    per_unit["residual"] = per_unit["drift_ratio"] - ratio * per_unit["keys"]
+    _, residual_var = stratified_total(per_unit, strata, "residual")
+
+    high_risk = stratified_total(per_unit, strata, "high_drift")
+    dormant = stratified_total(per_unit, strata, "is_dormant")
+    districts = stratified_total(per_unit, strata, "high_drift", by=STRATA)
+    districts = districts.sort_values("total", ascending=False).head(top)
+
+    return {
+        "fraction": fraction,
+        "seed": seed,
+        "z": z,
+        "pincodes_sampled": len(sampled),
+        "pincodes_total": int(strata["N"].sum()),
+        "rows_scored": len(df),
+        "avg_drift_ratio": _interval(ratio, residual_var / key_total ** 2, z),
+        "high_risk_keys": _interval(*high_risk, z),
+        "dormant_keys": _interval(*dormant, z),
+        "top_districts": pd.DataFrame(
+            [_interval(r.total, r.variance, z) for r in districts.itertuples()],
+            index=districts.index, columns=["estimate", "low", "high"],
+        ),
+    }
+
+def _normal_cdf(z):
+    return 0.5 * (1 + erf(z / sqrt(2)))
+
+def print_preview(report):
+    share = report["pincodes_sampled"] / max(report["pincodes_total"], 1)
+    print(f"\n--- KEY INSIGHTS (PREVIEW: {report['pincodes_sampled']:,} of {report['pincodes_total']:,} "
+          f"pincodes, {share:.1%}, seed {report['seed']}; {2 * _normal_cdf(report['z']) - 1:.0%} intervals) ---")
+    est, lo, hi = report["avg_drift_ratio"]
+    print(f"Average National Identity Drift Ratio: {est:.2f} [{lo:.2f}, {hi:.2f}]")
+    est, lo, hi = report["high_risk_keys"]
+    print(f"Count of High-Risk Pincodes (Drift > {HIGH_DRIFT}): ~{est:,.0f} [{max(lo, 0):,.0f}, {hi:,.0f}]")
+    est, lo, hi = report["dormant_keys"]
+    print(f"Count of 'Digital Dark Zones' (High Pop, Zero Bio Updates): ~{est:,.0f} "
+          f"[{max(lo, 0):,.0f}, {hi:,.0f}]")
+    print("\nTop 5 Districts with Highest Identity Degradation (estimated high-risk pincodes):")
+    print(report["top_districts"].clip(lower=0).round(0).to_string())
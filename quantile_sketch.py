@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# Every quantile is within this relative error of the exact order statistic
+RELATIVE_ACCURACY = 0.01
+# Group label used when the sketch is not split by region
+ALL = "__all__"
+# Bucket index for zeros (log buckets only cover positive values); sorts first
+ZERO_BUCKET = np.iinfo(np.int64).min
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with log-spaced buckets (DDSketch): a value x
+    lands in bucket ceil(log_gamma(x)), gamma = (1 + a) / (1 - a), i.e. in
+    (gamma^(k-1), gamma^k]. Quantiles are reported as the bucket's upper
+    bound, so they never fall below the exact order statistic and exceed it
+    by at most gamma - 1 (about 2a) relatively; for integer data the bound
+    is floored, which keeps it at or above the (integer) exact value.
+
+    Counts are kept per (group, bucket), so one pass fills a national
+    sketch and per-state/district sketches alike, and sketches from
+    chunks or worker processes combine with merge().
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        # Whether every value seen so far was a whole number
+        self.integer = True
+        self.counts = pd.Series(
+            dtype="int64",
+            index=pd.MultiIndex.from_arrays([[], np.array([], dtype="int64")], names=["group", "bucket"]),
+        )
+
+    def _buckets(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if np.any(values < 0):
+            raise ValueError("QuantileSketch only holds non-negative values.")
+        buckets = np.full(len(values), ZERO_BUCKET, dtype=np.int64)
+        positive = values > 0
+        buckets[positive] = np.ceil(np.log(values[positive]) / np.log(self.gamma))
+        return buckets
+
+    def update(self, values, groups=None):
+        """
+        Adds values (array-like), optionally labelled with one group per value.
+        NaNs are skipped.
+        """
+        values = pd.Series(np.asarray(values, dtype=np.float64))
+        keep = values.notna().to_numpy()
+        kept = values[keep].to_numpy()
+        self.integer = self.integer and bool(np.array_equal(kept, np.floor(kept)))
+        groups = np.full(len(values), ALL, dtype=object) if groups is None else np.asarray(groups, dtype=object)
+        batch = (
+            pd.DataFrame({"group": groups[keep], "bucket": self._buckets(kept)})
+            .value_counts()
+        )
+        self.counts = self.counts.add(batch, fill_value=0).astype("int64")
+        return self
+
+    def merge(self, other):
+        """
+        Folds another sketch (same accuracy) into this one.
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy.")
+        self.counts = self.counts.add(other.counts, fill_value=0).astype("int64")
+        self.integer = self.integer and other.integer
+        return self
+
+    def count(self):
+        return int(self.counts.sum())
+
+    def quantiles(self, q):
+        """
+        Estimated q-quantile of every group, as a Series indexed by group.
+        """
+        counts = self.counts[self.counts > 0].sort_index()
+        if counts.empty:
+            return pd.Series(dtype="float64")
+        by_group = counts.groupby(level="group")
+        cum = by_group.cumsum()
+        # Same rank as pandas' quantile before interpolation: q * (n - 1), 0-based
+        rank = q * (by_group.transform("sum") - 1)
+        hit = cum[cum > rank].groupby(level="group").head(1)
+        buckets = hit.index.get_level_values("bucket").to_numpy()
+        # Upper bound of (gamma^(k-1), gamma^k]: never below the exact value,
+        # so a strict "> threshold" test can't pick up keys tied at it
+        estimates = np.where(buckets == ZERO_BUCKET, 0.0, self.gamma ** buckets.astype(np.float64))
+        if self.integer:
+            # Small epsilon: gamma^k can come out a hair below a whole number
+            estimates = np.floor(estimates + 1e-9)
+        return pd.Series(estimates, index=hit.index.get_level_values("group"), name=q)
+
+    def quantile(self, q, group=ALL):
+        return float(self.quantiles(q)[group])
+
+def sketch_column(df, column, by=None, relative_accuracy=RELATIVE_ACCURACY):
+    """
+    Sketch of df[column], split by the region columns in by (None,
+    "state" or ["state", "district"]).
+    """
+    sketch = QuantileSketch(relative_accuracy)
+    return sketch.update(df[column].to_numpy(), group_labels(df, by))
+
+def group_labels(df, by):
+    # One label per row; state/district names are joined so they stay distinct
+    if by is None:
+        return None
+    cols = [by] if isinstance(by, str) else list(by)
+    labels = df[cols[0]].astype(str)
+    for col in cols[1:]:
+        labels = labels + "|" + df[col].astype(str)
+    return labels.to_numpy(dtype=object)
@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import worker_init
+
+# Figures only ever go to files, so no GUI backend is needed (or wanted)
+BACKEND = "Agg"
+
+def pyplot():
+    """
+    matplotlib.pyplot on the Agg backend, imported on first use so the
+    data-only paths never pay for the plotting libraries.
+    """
+    import matplotlib
+    matplotlib.use(BACKEND, force=True)
+    import matplotlib.pyplot as plt
+    return plt
+
+def seaborn():
+    """
+    seaborn, imported after pyplot() has pinned the backend.
+    """
+    pyplot()
+    import seaborn as sns
+    return sns
+
+def save_figure(path):
+    """
+    Saves the current figure to path and closes it, so memory does not
+    build up across plots.
+    """
+    plt = pyplot()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    plt.savefig(path)
+    plt.close()
+    print(f"Generated: {path}")
+
+def render_figures(jobs, workers=None):
+    """
+    Runs independent figure jobs, each a (function, args, kwargs) tuple,
+    in a process pool and returns their results in job order.
+
+    Functions must be module-level so they can be pickled, and should
+    only receive the columns they draw. With one worker (or one job) the
+    jobs run in this process instead.
+    """
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1:
+        return [func(*args, **kwargs) for func, args, kwargs in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=worker_init) as pool:
+        futures = [pool.submit(func, *args, **kwargs) for func, args, kwargs in jobs]
+        return [f.result() for f in futures]
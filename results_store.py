@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import pandas as pd
+from instrumentation import instrumented
+
+DB_PATH = "output/aadhaar_pulse.db"
+TABLE = "pulse"
+
+# (name, columns) - district/state compare case-insensitively, so the
+# indexes are built with the same collation or SQLite would not use them.
+INDEXES = [
+    ("idx_pulse_district_period", "district COLLATE NOCASE, period"),
+    ("idx_pulse_state_period", "state COLLATE NOCASE, period"),
+    ("idx_pulse_pincode_period", "pincode, period"),
+    ("idx_pulse_period", "period"),
+]
+
+def add_period(df):
+    """
+    'YYYY-MM' period label, which also sorts chronologically as text.
+    """
+    df = df.copy()
+    df["period"] = (
+        df["year"].astype(int).astype(str) + "-" + df["month"].astype(int).astype(str).str.zfill(2)
+    )
+    return df
+
+@instrumented()
+def write_results(df, db_path=DB_PATH, chunksize=100_000):
+    """
+    Replaces the results table with df and (re)builds the indexes.
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    df = add_period(df)
+    # SQLite has no categorical type
+    for col in df.select_dtypes(include="category").columns:
+        df[col] = df[col].astype(str)
+
+    with sqlite3.connect(db_path) as con:
+        df.to_sql(TABLE, con, if_exists="replace", index=False, chunksize=chunksize)
+        for name, cols in INDEXES:
+            con.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {TABLE} ({cols})")
+        con.execute("ANALYZE")
+    print(f"Results store updated: {db_path} ({len(df):,} rows)")
+
+def _connect(db_path):
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No results store at '{db_path}'. Run run_pipeline.py first.")
+    return sqlite3.connect(db_path)
+
+def _table_columns(con):
+    return [row[1] for row in con.execute(f"PRAGMA table_info({TABLE})")]
+
+def _where(state=None, district=None, pincode=None, start=None, end=None):
+    clauses, params = [], []
+    if state is not None:
+        clauses.append("state = ? COLLATE NOCASE")
+        params.append(state)
+    if district is not None:
+        clauses.append("district = ? COLLATE NOCASE")
+        params.append(district)
+    if pincode is not None:
+        clauses.append("pincode = ?")
+        params.append(int(pincode))
+    if start is not None:
+        clauses.append("period >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("period <= ?")
+        params.append(end)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def _check_columns(con, columns):
+    known = _table_columns(con)
+    unknown = [c for c in columns if c not in known]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+
+def query_rows(columns=None, state=None, district=None, pincode=None, start=None, end=None,
+               db_path=DB_PATH):
+    """
+    Rows matching the filters, ordered by period. start/end are inclusive
+    'YYYY-MM' bounds; columns=None returns every column.
+    """
+    with _connect(db_path) as con:
+        if columns is None:
+            select = "*"
+        else:
+            _check_columns(con, columns)
+            select = ", ".join(f'"{c}"' for c in columns)
+        where, params = _where(state, district, pincode, start, end)
+        return pd.read_sql_query(f"SELECT {select} FROM {TABLE}{where} ORDER BY period", con, params=params)
+
+def query_district(district, start=None, end=None, columns=None, db_path=DB_PATH):
+    """
+    e.g. query_district("Indore", "2025-01", "2025-06", ["period", "AIHS"])
+    """
+    return query_rows(columns, district=district, start=start, end=end, db_path=db_path)
@@ -1,40 +1,347 @@
-import pandas as pd
+import argparse
 import os
-from feature_engineering import build_features
-from ml_pipeline import run_analytical_pipeline
+from feature_engineering import build_features, build_features_streaming
+from input_cache import load_normalized, load_sources, CACHE_DIR, MAX_CACHE_BYTES
+from schema import memory_report
+from parallel_pipeline import build_scored_features_parallel
+from polars_engine import build_scored_features_polars
+from incremental import STATE_DIR, has_state, full_rebuild, apply_delta, verify_against_full
+from model_selection import select_n_clusters, SILHOUETTE_SAMPLE
+from scoring import compute_aihs
+from ml_pipeline import run_analytical_pipeline, load_models, compare_with_full_kmeans, MODEL_DIR
 from visualization import plot_drift_heatmap, plot_risk_clusters
+from rendering import render_figures
+from instrumentation import enable, disable, stage, summary, write_json, write_chrome_trace, write_profile
+from validation import ValidationReport, load_regions
+from temporal import add_temporal_features
+from preview import preview_insights, print_preview
+from results_store import write_results, add_period
+from partitioned_output import write_partitioned, export_district_csv, PARQUET_ROOT
 
 # Ensure output directory exists
 os.makedirs("output", exist_ok=True)
 os.makedirs("models", exist_ok=True)
 
-def main():
-    print("--- Starting Aadhaar Pulse Analytical Pipeline ---")
+# NOTE: Ensure these paths match your actual CSV locations
+ENROLL_PATH = "data/enrollment.csv"
+DEMO_PATH = "data/demographic.csv"
+BIO_PATH = "data/biometric.csv"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Aadhaar Pulse Analytical Pipeline")
+    parser.add_argument("--engine", choices=["pandas", "polars"], default="pandas",
+                        help="Run loading, feature engineering and scoring as one Polars lazy query "
+                             "(multithreaded, streaming) instead of step by step in pandas. Not combinable with "
+                             "--validate, --stream, --workers, --join, --dormancy-method sketch, "
+                             "--incremental or --preview.")
+    parser.add_argument("--preview", type=float, metavar="FRACTION",
+                        help="Only print the key insights, with confidence intervals, estimated from this "
+                             "fraction of pincodes sampled per state/district (e.g. 0.05). Writes nothing. "
+                             "Strata are sampled at least 2 pincodes deep, so on small samples the intervals, "
+                             "the average drift ratio's most of all, cover less than their nominal 95%%.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed of the --preview sample.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the input CSVs in chunks instead of loading them whole.")
+    parser.add_argument("--chunksize", type=int, default=500_000,
+                        help="Rows per chunk in --stream mode.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always re-parse the CSVs instead of reusing the normalized-frame cache.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="Directory for cached Parquet copies of the normalized inputs.")
+    parser.add_argument("--cache-max-mb", type=int, default=MAX_CACHE_BYTES // 2 ** 20,
+                        help="Size limit of the cache directory; oldest entries are evicted first.")
+    parser.add_argument("--compact", action="store_true",
+                        help="Use the compact dtype schema (categorical keys, narrow ints, unsigned counts).")
+    parser.add_argument("--float32", action="store_true",
+                        help="With --compact, also store ratios and scores as float32.")
+    parser.add_argument("--join", choices=["packed", "merge"], default="packed",
+                        help="Align the three sources on a packed int64 key (default) or with DataFrame.merge.")
+    parser.add_argument("--validate", action="store_true",
+                        help="Drop input rows that fail the validation rules (dates, month/year range, "
+                             "6-digit pincode, non-negative counts) before aggregation and report why.")
+    parser.add_argument("--regions", metavar="CSV",
+                        help="With --validate, also reject (state, district) pairs missing from this CSV.")
+    parser.add_argument("--dormancy-by", choices=["national", "state", "district"], default="national",
+                        help="Take the is_dormant enrolment quartile nationally or per state / district.")
+    parser.add_argument("--dormancy-method", choices=["exact", "sketch"], default="exact",
+                        help="Exact quantile, or a mergeable quantile sketch combined across chunks and "
+                             "workers. The sketch rounds the quartile up (at most ~2%% above the exact one), "
+                             "so is_dormant can only miss keys just above the exact threshold, never add any.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Run feature engineering and scoring in this many processes, one shard at a time.")
+    parser.add_argument("--shard-by", choices=["state", "district"], default="state",
+                        help="Shard granularity for --workers > 1.")
+    parser.add_argument("--predict-only", action="store_true",
+                        help="Assign risk_cluster with the saved scaler/KMeans instead of refitting them.")
+    parser.add_argument("--model-dir", default=MODEL_DIR,
+                        help="Where scaler.pkl / kmeans.pkl are read from and saved to.")
+    parser.add_argument("--cluster-engine", choices=["kmeans", "minibatch"], default="kmeans",
+                        help="Full KMeans (default) or streamed StandardScaler/MiniBatchKMeans partial_fit.")
+    parser.add_argument("--cluster-chunk", type=int, default=100_000,
+                        help="Rows per chunk for --cluster-engine minibatch.")
+    parser.add_argument("--select-k", metavar="MIN-MAX",
+                        help="Pick the cluster count in this range (e.g. 2-8) by a parallel sweep scored "
+                             "with sampled silhouette, Davies-Bouldin and inertia, instead of fixing 3.")
+    parser.add_argument("--select-seeds", type=int, default=1,
+                        help="With --select-k, also try this many KMeans seeds per cluster count.")
+    parser.add_argument("--select-sample", type=int, default=SILHOUETTE_SAMPLE,
+                        help="With --select-k, rows in the stratified silhouette sample.")
+    parser.add_argument("--compare-kmeans", action="store_true",
+                        help="With --cluster-engine minibatch, report inertia and label agreement against full KMeans.")
+    parser.add_argument("--heatmap-tiles", action="store_true",
+                        help="Split the drift heatmap over several files instead of keeping only the top districts.")
+    parser.add_argument("--plot-workers", type=int, default=None,
+                        help="Processes for rendering figures (default: one per figure, up to the CPU count).")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Record wall/CPU time, peak RSS and rows per stage to this JSON file.")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Also write the stages as a Chrome trace (chrome://tracing, Perfetto).")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Add per-stage tracemalloc peaks to the metrics (slows the run down).")
+    parser.add_argument("--profile-stage", metavar="STAGE",
+                        help="Run this stage (e.g. features, normalize_dates, fit_risk_model) under cProfile.")
+    parser.add_argument("--temporal", action="store_true",
+                        help="Add month-over-month deltas, rolling means and AIHS dip/anomaly flags "
+                             "per pincode and district to the stored output.")
+    parser.add_argument("--csv", action="store_true",
+                        help="Also export the full output as output/aadhaar_pulse_analysis.csv.")
+    parser.add_argument("--export-district", action="append", default=[], metavar="DISTRICT",
+                        help="Write data/output/<district>/ CSV as a filtered read of the Parquet output (repeatable).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fold only new rows from --delta-dir into the stored aggregates and output.")
+    parser.add_argument("--delta-dir", default="data/delta",
+                        help="Folder with the new month's enrollment/demographic/biometric CSVs.")
+    parser.add_argument("--state-dir", default=STATE_DIR,
+                        help="Where --incremental keeps per-key aggregates and the scored output.")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="With --incremental, rebuild the stored state from the full 'data/' files.")
+    parser.add_argument("--verify", action="store_true",
+                        help="With --incremental, check the delta result against a full rebuild of 'data/' "
+                             "(which should then hold the whole history, delta rows included).")
+    args = parser.parse_args(argv)
+
+    if args.engine == "polars":
+        # The Polars plan covers load, features and scoring on its own
+        ignored = [flag for flag, used in [
+            ("--validate", args.validate),
+            ("--stream", args.stream),
+            ("--workers", args.workers > 1),
+            ("--join", args.join != "packed"),
+            ("--dormancy-method sketch", args.dormancy_method == "sketch"),
+            ("--incremental", args.incremental),
+            ("--preview", args.preview),
+        ] if used]
+        if ignored:
+            parser.error(f"--engine polars cannot be combined with {', '.join(ignored)}")
+    return args
+
+def load_inputs(args, paths=(ENROLL_PATH, DEMO_PATH, BIO_PATH)):
+    """
+    Parsed + date-normalized input frames, cached by file content.
+    """
+    cache_opts = dict(
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        max_bytes=args.cache_max_mb * 2 ** 20,
+    )
+    return validate_inputs(load_sources(paths, **cache_opts), paths, args)
+
+def load_delta_inputs(args):
+    # Any of the three delta files may be absent for a given batch
+    paths = [os.path.join(args.delta_dir, os.path.basename(p)) for p in (ENROLL_PATH, DEMO_PATH, BIO_PATH)]
+    if not any(os.path.exists(p) for p in paths):
+        return None
+    frames = [load_normalized(p, use_cache=False) if os.path.exists(p) else None for p in paths]
+    return validate_inputs(frames, paths, args)
+
+def make_validators(args):
+    # One report per source, or None when --validate is off
+    if not args.validate:
+        return None
+    regions = load_regions(args.regions) if args.regions else None
+    return [ValidationReport(regions=regions) for _ in range(3)]
+
+def print_validation(validators, paths):
+    for validator, path in zip(validators, paths):
+        print(f" - {path}: {validator}")
+
+def validate_inputs(frames, paths, args):
+    validators = make_validators(args)
+    if validators is None:
+        return frames
+    with stage("validate", inputs=[f for f in frames if f is not None]) as s:
+        frames = [None if f is None else v.apply(f) for f, v in zip(frames, validators)]
+        s.output([f for f in frames if f is not None])
+    print_validation(validators, paths)
+    return frames
+
+def dormancy_opts(args):
+    return dict(dormancy_by=args.dormancy_by, dormancy_method=args.dormancy_method)
+
+def run_incremental(args):
+    if args.full_rebuild or not has_state(args.state_dir):
+        print("Loading datasets (full rebuild)...")
+        enroll, demo, bio = load_inputs(args)
+        print("Engineering Vitality Metrics & Scoring full history...")
+        return full_rebuild(enroll, demo, bio, args.state_dir, normalized=True, model_dir=args.model_dir,
+                            **dormancy_opts(args))
+
+    print(f"Loading new rows from '{args.delta_dir}/'...")
+    delta = load_delta_inputs(args)
+    if delta is None:
+        print(f"Error: no delta files found in '{args.delta_dir}/'.")
+        return None
+    print("Updating Vitality Metrics & Scores for touched keys...")
+    df_scored = apply_delta(*delta, state_dir=args.state_dir, model_dir=args.model_dir, normalized=True,
+                            **dormancy_opts(args))
 
-    # 1. Load Data
-    # NOTE: Ensure these paths match your actual CSV locations
-    print("Loading datasets...")
+    if args.verify:
+        print("Verifying delta state against a full rebuild...")
+        report = verify_against_full(*load_inputs(args), state_dir=args.state_dir,
+                                     model_dir=args.model_dir, normalized=True, **dormancy_opts(args))
+        print(report)
+    return df_scored
+
+def main(argv=None):
+    args = parse_args(argv)
+    instrument = bool(args.metrics or args.trace or args.profile_stage)
+    if instrument:
+        enable(trace_memory=args.trace_memory, profile_stage=args.profile_stage)
     try:
-        enroll = pd.read_csv("data/enrollment.csv")
-        demo = pd.read_csv("data/demographic.csv")
-        bio = pd.read_csv("data/biometric.csv")
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
+        run(args)
+    finally:
+        if instrument:
+            if args.profile_stage:
+                write_profile(f"output/profile_{args.profile_stage}.prof")
+            records = disable()
+            print("\nStage metrics:")
+            print(summary(records).to_string(index=False, float_format="%.3f"))
+            if args.metrics:
+                write_json(records, args.metrics)
+            if args.trace:
+                write_chrome_trace(records, args.trace)
+
+def run(args):
+    print("--- Starting Aadhaar Pulse Analytical Pipeline ---")
+
+    missing = [p for p in (ENROLL_PATH, DEMO_PATH, BIO_PATH) if not os.path.exists(p)]
+    if missing:
+        print(f"Error: missing input files: {', '.join(missing)}")
         print("Please place 'enrollment.csv', 'demographic.csv', 'biometric.csv' in the 'data/' folder.")
         return
 
-    # 2. Feature Engineering
-    print("Engineering Vitality Metrics (Drift, MBU, Dormancy)...")
-    df_features = build_features(enroll, demo, bio)
+    if args.preview:
+        # Sampled run: load, features and scores on a stratified sample of pincodes only
+        print(f"Loading datasets (preview of {args.preview:.1%} of pincodes)...")
+        with stage("load") as s:
+            enroll, demo, bio = s.output(load_inputs(args))
+        with stage("preview", inputs=[enroll, demo, bio]):
+            report = preview_insights(enroll, demo, bio, args.preview, args.seed, normalized=True)
+        print_preview(report)
+        return
+
+    if args.incremental:
+        # 1-3. Delta update of the stored aggregates, scores and clusters
+        with stage("incremental") as s:
+            df_scored = s.output(run_incremental(args))
+        if df_scored is None:
+            return
+    else:
+        if args.engine == "polars":
+            # 1+2. Scan, Aggregate, Engineer Features and Score in one Polars query plan
+            print("Engineering Vitality Metrics & Scores on the Polars engine...")
+            with stage("features") as s:
+                df_features = s.output(build_scored_features_polars(
+                    ENROLL_PATH, DEMO_PATH, BIO_PATH, compact=args.compact, float32=args.float32,
+                    dormancy_by=args.dormancy_by,
+                ))
+        elif args.stream:
+            # 1+2. Stream, Aggregate and Engineer Features chunk by chunk
+            print(f"Streaming datasets in chunks of {args.chunksize:,} rows...")
+            print("Engineering Vitality Metrics (Drift, MBU, Dormancy)...")
+            validators = make_validators(args)
+            with stage("features") as s:
+                df_features = s.output(build_features_streaming(
+                    ENROLL_PATH, DEMO_PATH, BIO_PATH, args.chunksize,
+                    compact=args.compact, float32=args.float32, join=args.join, **dormancy_opts(args),
+                    validators=validators,
+                ))
+            if validators is not None:
+                print_validation(validators, (ENROLL_PATH, DEMO_PATH, BIO_PATH))
+        else:
+            # 1. Load Data
+            print("Loading datasets...")
+            with stage("load") as s:
+                enroll, demo, bio = s.output(load_inputs(args))
+
+            # 2. Feature Engineering
+            print("Engineering Vitality Metrics (Drift, MBU, Dormancy)...")
+            feature_opts = dict(normalized=True, compact=args.compact, float32=args.float32, join=args.join,
+                                **dormancy_opts(args))
+            with stage("features", inputs=[enroll, demo, bio]) as s:
+                if args.workers > 1:
+                    # Shards are scored in the workers too; only clustering is left
+                    df_features = build_scored_features_parallel(
+                        enroll, demo, bio, workers=args.workers, shard_by=args.shard_by, **feature_opts
+                    )
+                else:
+                    df_features = build_features(enroll, demo, bio, **feature_opts)
+                s.output(df_features)
+
+        # 3. Analytical Modeling
+        if args.predict_only:
+            print("Running Health Scoring & Risk Cluster Assignment (saved models)...")
+        else:
+            print("Running Risk Clustering & Health Scoring...")
+        scored = args.engine == "polars" or (args.workers > 1 and not args.stream)
+        n_clusters, seed = 3, 42
+        if args.select_k and not args.predict_only:
+            lo, hi = (int(k) for k in args.select_k.split("-"))
+            print(f"Selecting the cluster count in {lo}-{hi}...")
+            with stage("model_selection", inputs=df_features):
+                if not scored:
+                    df_features, scored = compute_aihs(df_features), True
+                n_clusters, seed, sweep = select_n_clusters(
+                    df_features, range(lo, hi + 1), seeds=range(42, 42 + args.select_seeds),
+                    silhouette_sample=args.select_sample, model_dir=args.model_dir,
+                )
+            print(sweep.to_string(index=False, float_format="%.3f"))
+            print(f" - Using {n_clusters} clusters (seed {seed})")
+        with stage("scoring", inputs=df_features) as s:
+            df_scored, kmeans_model = run_analytical_pipeline(
+                df_features, scored=scored, fit=not args.predict_only, model_dir=args.model_dir,
+                engine=args.cluster_engine, chunk_size=args.cluster_chunk,
+                n_clusters=n_clusters, random_state=seed,
+            )
+            s.output(df_scored)
+
+        if args.temporal:
+            print("Deriving temporal features (MoM deltas, rolling means, dips)...")
+            with stage("temporal", inputs=df_scored) as s:
+                df_scored = s.output(add_temporal_features(df_scored))
+
+        if args.compare_kmeans and args.cluster_engine == "minibatch" and not args.predict_only:
+            print("\nStreamed clustering vs. full KMeans:")
+            scaler, kmeans_model = load_models(args.model_dir)
+            print(compare_with_full_kmeans(df_scored, df_scored["risk_cluster"].to_numpy(), scaler, kmeans_model))
 
-    # 3. Analytical Modeling
-    print("Running Risk Clustering & Health Scoring...")
-    df_scored, kmeans_model = run_analytical_pipeline(df_features)
+        if args.compact:
+            print("\nMemory saved by the compact schema (bytes):")
+            print(memory_report(df_scored).to_string())
 
     # 4. Generate Visualizations for PDF
     print("Generating Plots...")
-    plot_drift_heatmap(df_scored)
-    plot_risk_clusters(df_scored)
+    # Independent figures, each sent only the columns it draws
+    heatmap_columns = ["district", "year", "month", "drift_ratio"]
+    if "period_ord" in df_scored.columns:
+        heatmap_columns.append("period_ord")
+    with stage("plots", inputs=df_scored):
+        render_figures([
+            (plot_drift_heatmap, (df_scored[heatmap_columns],),
+             {"tiles": args.heatmap_tiles}),
+            (plot_risk_clusters, (df_scored[["drift_ratio", "mbu_velocity", "risk_cluster"]],), {}),
+        ], workers=args.plot_workers)
 
     # 5. Output Key Findings (For your Report text)
     print("\n--- KEY INSIGHTS GENERATED ---")
@@ -52,9 +359,16 @@ def main():
     print("\nTop 5 Districts with Highest Identity Degradation:")
     print(top_risk_districts)
     
-    # Save processed data for review
-    df_scored.to_csv("output/aadhaar_pulse_analysis.csv", index=False)
+    # Save processed data for review (Parquet partitioned by state/period; CSV on request)
+    with stage("write", inputs=df_scored):
+        write_partitioned(df_scored, PARQUET_ROOT)
+        if args.csv:
+            add_period(df_scored).to_csv("output/aadhaar_pulse_analysis.csv", index=False)
+        for district in args.export_district:
+            export_district_csv(district, root=PARQUET_ROOT)
+        # Indexed copy for the generate_* scripts (district/period lookups)
+        write_results(df_scored)
     print("\nAnalysis Complete. Results saved to 'output/' directory.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+import scoring
+from partitioned_output import PARQUET_ROOT, load_results
+
+# One column per AIHS parameter; a scenario table may leave any of them out
+# and gets the current scoring.py value for it.
+PARAMETERS = {
+    "mbu_log_factor": scoring.MBU_LOG_FACTOR,
+    "mbu_cap": scoring.MBU_CAP,
+    "drift_floor": scoring.DRIFT_FLOOR,
+    "drift_ceiling": scoring.DRIFT_CEILING,
+    "mbu_weight": scoring.MBU_WEIGHT,
+    "drift_weight": scoring.DRIFT_WEIGHT,
+    "critical_threshold": 20,
+}
+
+def scenario_grid(**ranges):
+    """
+    Cartesian product of parameter values, e.g.
+    scenario_grid(mbu_log_factor=[25, 30, 35], drift_ceiling=[2.5, 3.0, 4.0]).
+    """
+    names = list(ranges)
+    rows = [dict(zip(names, values)) for values in itertools.product(*ranges.values())]
+    return complete_scenarios(pd.DataFrame(rows))
+
+def complete_scenarios(scenarios):
+    scenarios = scenarios.copy()
+    for name, default in PARAMETERS.items():
+        if name not in scenarios.columns:
+            scenarios[name] = default
+    unknown = [c for c in scenarios.columns if c not in PARAMETERS and c != "scenario"]
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {unknown}")
+    if (scenarios["drift_ceiling"] <= scenarios["drift_floor"]).any():
+        raise ValueError("drift_ceiling must be greater than drift_floor")
+    if "scenario" not in scenarios.columns:
+        scenarios.insert(0, "scenario", np.arange(len(scenarios)))
+    return scenarios.reset_index(drop=True)
+
+def _score_block(log_v, drift, p):
+    """
+    AIHS for every (scenario, row) pair of one block, shape
+    (scenarios, rows). Same operation order as scoring.aihs_kernel, so the
+    default scenario reproduces compute_aihs exactly.
+    """
+    mbu = np.minimum(p["mbu_log_factor"][:, None] * log_v[None, :], p["mbu_cap"][:, None])
+
+    floor = p["drift_floor"][:, None]
+    ceiling = p["drift_ceiling"][:, None]
+    drift_score = np.clip(drift[None, :], floor, ceiling)
+    drift_score -= floor
+    drift_score /= ceiling - floor
+    drift_score *= 100
+    np.subtract(100, drift_score, out=drift_score)
+
+    mbu *= p["mbu_weight"][:, None]
+    drift_score *= p["drift_weight"][:, None]
+    mbu += drift_score
+    return np.round(mbu, 2, out=mbu)
+
+def evaluate_scenarios(df, scenarios, block_rows=100_000, block_scenarios=32):
+    """
+    Scores every (scenario, pincode-month) pair with NumPy broadcasting,
+    block_scenarios x block_rows at a time, and keeps only running totals.
+    The full scenarios x rows matrix is never built.
+
+    Returns (summary, district_ranks):
+      summary        one row per scenario: mean AIHS, rows below its
+                     critical_threshold, and its lowest-scoring district
+      district_ranks one row per (scenario, state, district): mean AIHS and
+                     rank, 1 = lowest AIHS (most degraded)
+    """
+    scenarios = complete_scenarios(scenarios)
+    n_scen = len(scenarios)
+
+    velocity = df["mbu_velocity"].to_numpy(np.float64)
+    drift = df["drift_ratio"].to_numpy(np.float64)
+    # ln(v + 1) does not depend on the scenario, so it is computed once
+    log_v = np.log(np.maximum(velocity, 0) + 1)
+
+    district_codes, districts = pd.MultiIndex.from_frame(df[["state", "district"]]).factorize()
+    n_dist = len(districts)
+
+    total = np.zeros(n_scen)
+    valid = np.zeros(n_scen)
+    critical = np.zeros(n_scen)
+    dist_total = np.zeros((n_scen, n_dist))
+    dist_count = np.zeros((n_scen, n_dist))
+
+    for s0 in range(0, n_scen, block_scenarios):
+        s1 = min(s0 + block_scenarios, n_scen)
+        block = scenarios.iloc[s0:s1]
+        params = {name: block[name].to_numpy(np.float64) for name in PARAMETERS}
+        width = s1 - s0
+        offsets = (np.arange(width) * n_dist)[:, None]
+
+        for r0 in range(0, len(df), block_rows):
+            r1 = min(r0 + block_rows, len(df))
+            aihs = _score_block(log_v[r0:r1], drift[r0:r1], params)
+
+            # NaN inputs give NaN scores; leave them out like pandas' mean does
+            ok = ~np.isnan(aihs)
+            aihs_or_zero = np.where(ok, aihs, 0.0)
+            total[s0:s1] += aihs_or_zero.sum(axis=1)
+            valid[s0:s1] += ok.sum(axis=1)
+            critical[s0:s1] += (aihs < params["critical_threshold"][:, None]).sum(axis=1)
+
+            # Per-district sums for all scenarios in the block in one bincount
+            flat = (offsets + district_codes[r0:r1][None, :]).ravel()
+            dist_total[s0:s1] += np.bincount(flat, aihs_or_zero.ravel(), width * n_dist).reshape(width, n_dist)
+            dist_count[s0:s1] += np.bincount(flat, ok.ravel(), width * n_dist).reshape(width, n_dist)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_aihs = total / valid
+        dist_mean = dist_total / dist_count
+
+    district_ranks = pd.DataFrame({
+        "scenario": np.repeat(scenarios["scenario"].to_numpy(), n_dist),
+        "state": np.tile(districts.get_level_values(0), n_scen),
+        "district": np.tile(districts.get_level_values(1), n_scen),
+        "mean_AIHS": dist_mean.ravel(),
+    })
+    district_ranks["rank"] = (
+        district_ranks.groupby("scenario")["mean_AIHS"].rank(method="min").astype("Int64")
+    )
+
+    summary = scenarios.copy()
+    summary["mean_AIHS"] = mean_aihs
+    summary["count_below_critical"] = critical.astype(np.int64)
+    if n_dist:
+        worst = np.nanargmin(np.where(np.isnan(dist_mean), np.inf, dist_mean), axis=1)
+        summary["worst_district"] = districts.get_level_values(1)[worst]
+    return summary, district_ranks
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate many AIHS parameter sets in one pass.")
+    parser.add_argument("scenarios", help="CSV with one parameter set per row (columns: %s)." % ", ".join(PARAMETERS))
+    parser.add_argument("--input", default=PARQUET_ROOT,
+                        help="Partitioned Parquet output, or a CSV export.")
+    parser.add_argument("--output-prefix", default="output/scenario")
+    args = parser.parse_args()
+
+    df = load_results(args.input, columns=["state", "district", "mbu_velocity", "drift_ratio"])
+    summary, ranks = evaluate_scenarios(df, pd.read_csv(args.scenarios))
+    summary.to_csv(f"{args.output_prefix}_summary.csv", index=False)
+    ranks.to_csv(f"{args.output_prefix}_district_ranks.csv", index=False)
+    print(summary.to_string(index=False))
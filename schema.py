@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+# Compact dtypes for the join keys. year/month use the nullable variants at
+# load time because unparseable dates leave gaps until aggregation drops them.
+KEY_DTYPES = {
+    "state": "category",
+    "district": "category",
+    "pincode": "int32",
+    "year": "int16",
+    "month": "int8",
+}
+NULLABLE_KEY_DTYPES = {"pincode": "Int32", "year": "Int16", "month": "Int8"}
+
+# Derived float columns that can optionally be stored as float32
+SCORE_COLUMNS = ["drift_ratio", "mbu_velocity", "score_mbu", "score_drift", "AIHS"]
+
+FLAG_COLUMNS = ["is_dormant"]
+
+# Counts never go below uint32: the feature step adds counts together and
+# adds 1 to them, which would silently wrap around in uint8/uint16.
+COUNT_DTYPES = ("uint32", "uint64")
+
+def _shared_categories(frames, col):
+    values = pd.concat([f[col].dropna() for f in frames if col in f.columns], ignore_index=True)
+    return pd.Index(values.unique()).sort_values()
+
+def _narrow_unsigned(s):
+    # Only whole, non-negative counts qualify; anything else is left alone.
+    if s.empty or s.isna().any() or (s < 0).any() or not np.array_equal(s, np.floor(s)):
+        return s
+    for dtype in COUNT_DTYPES:
+        if s.max() <= np.iinfo(dtype).max:
+            return s.astype(dtype)
+    return s
+
+def compact_inputs(frames, keys=("state", "district", "pincode", "year", "month")):
+    """
+    Applies the compact key schema to a group of frames that will later be
+    merged. state/district share one category list across all frames so the
+    merges keep the categorical dtype instead of falling back to strings.
+    """
+    frames = [f.copy() for f in frames]
+    for col in keys:
+        if KEY_DTYPES.get(col) == "category":
+            categories = _shared_categories(frames, col)
+            for f in frames:
+                if col in f.columns:
+                    f[col] = pd.Categorical(f[col], categories=categories)
+        elif col in KEY_DTYPES:
+            for f in frames:
+                if col not in f.columns:
+                    continue
+                if f[col].isna().any():
+                    f[col] = f[col].astype(NULLABLE_KEY_DTYPES[col])
+                else:
+                    f[col] = f[col].astype(KEY_DTYPES[col])
+
+    for f in frames:
+        for col in f.select_dtypes(include="number").columns:
+            if col not in keys:
+                f[col] = _narrow_unsigned(f[col])
+    return frames
+
+def align_categories(frames, cols=("state", "district")):
+    """
+    Gives every categorical column in cols one shared, sorted category list
+    across frames, so pd.concat keeps it categorical. Only the codes are
+    remapped; the string values are not touched.
+    """
+    frames = list(frames)
+    for col in cols:
+        if not all(col in f.columns and isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            continue
+        categories = frames[0][col].cat.categories
+        for f in frames[1:]:
+            categories = categories.union(f[col].cat.categories)
+        categories = categories.sort_values()
+        for f in frames:
+            f[col] = f[col].cat.set_categories(categories)
+    return frames
+
+def compact_frame(df, float32=False, keys=("state", "district", "pincode", "year", "month")):
+    """
+    Narrows an aggregated or merged frame in place of its default dtypes:
+    plain (non-nullable) key ints, unsigned counts, int8 flags and, if
+    float32=True, single-precision score columns.
+    """
+    df = df.copy()
+    for col in keys:
+        dtype = KEY_DTYPES.get(col)
+        if col in df.columns and dtype != "category" and not df[col].isna().any():
+            df[col] = df[col].astype(dtype)
+
+    for col in df.select_dtypes(include="number").columns:
+        if col in keys:
+            continue
+        if col in FLAG_COLUMNS:
+            df[col] = df[col].astype("int8")
+        elif col in SCORE_COLUMNS:
+            if float32:
+                df[col] = df[col].astype("float32")
+        else:
+            # Counts, including the float copies left behind by merge + fillna(0)
+            df[col] = _narrow_unsigned(df[col])
+    return df
+
+def widen_frame(df):
+    """
+    The dtypes pandas would have inferred by default: object/str instead of
+    category, int64 for every integer and float64 for every float.
+    """
+    wide = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            wide[col] = s.astype(s.cat.categories.dtype)
+        elif pd.api.types.is_extension_array_dtype(s.dtype) and s.dtype.kind in "iu":
+            wide[col] = s.astype("float64") if s.isna().any() else s.astype("int64")
+        elif s.dtype.kind in "iu":
+            wide[col] = s.astype("int64")
+        elif s.dtype.kind == "f":
+            wide[col] = s.astype("float64")
+        else:
+            wide[col] = s
+    return pd.DataFrame(wide, index=df.index)
+
+def memory_report(df, baseline=None):
+    """
+    Bytes used per column by df versus baseline (default: df with default
+    pandas dtypes), sorted by bytes saved.
+    """
+    if baseline is None:
+        baseline = widen_frame(df)
+    before = baseline.memory_usage(deep=True, index=False)
+    after = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "bytes_before": before,
+        "bytes_after": after,
+    })
+    report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+    report = report.sort_values("bytes_saved", ascending=False)
+    report.loc["TOTAL"] = ["", before.sum(), after.sum(), before.sum() - after.sum()]
+    return report
@@ -1,13 +1,36 @@
 import numpy as np
 import pandas as pd
+from instrumentation import instrumented
 
-def compute_aihs(df):
+# AIHS formula parameters (see aihs_kernel for the reasoning behind them)
+MBU_LOG_FACTOR = 30
+MBU_CAP = 100
+DRIFT_FLOOR = 1.0
+DRIFT_CEILING = 3.0
+MBU_WEIGHT = 0.6
+DRIFT_WEIGHT = 0.4
+
+def aihs_kernel(mbu_velocity, drift_ratio, score_mbu=None, score_drift=None, aihs=None,
+                dtype=np.float64, scratch=None):
     """
-    Recalibrated Scoring Logic (Stricter Benchmarks)
-    to handle high-velocity backlog clearing data.
+    Array-level AIHS scoring. Writes score_mbu, score_drift and AIHS into
+    the given output buffers (allocated with dtype if not passed) using
+    out= ufuncs only, so the inputs are never copied. Works the same on
+    plain arrays, slices of larger buffers and np.memmap arrays.
+
+    scratch is an optional buffer the size of the inputs for the weighted
+    sum; it is allocated if not given. Returns (score_mbu, score_drift, aihs).
     """
-    df = df.copy()
-    
+    n = len(mbu_velocity)
+    if score_mbu is None:
+        score_mbu = np.empty(n, dtype=dtype)
+    if score_drift is None:
+        score_drift = np.empty(n, dtype=dtype)
+    if aihs is None:
+        aihs = np.empty(n, dtype=dtype)
+    if scratch is None:
+        scratch = np.empty(n, dtype=aihs.dtype)
+
     # ---------------------------------------------------------
     # 1. BIOMETRIC EFFICIENCY SCORE (Stricter & Logarithmic)
     # ---------------------------------------------------------
@@ -21,11 +44,13 @@ def compute_aihs(df):
     # Natural Log dampens the huge numbers (like 17 vs 50).
     
     # Clip velocity to avoid negative logs (though +1 handles it)
-    v = df['mbu_velocity'].clip(lower=0)
+    np.maximum(mbu_velocity, 0, out=score_mbu)
     
     # Factor 30 makes Velocity=20 hit approx 90-95 score.
-    mbu_score = 30 * np.log(v + 1)
-    df['score_mbu'] = mbu_score.clip(upper=100)
+    np.add(score_mbu, 1, out=score_mbu)
+    np.log(score_mbu, out=score_mbu)
+    np.multiply(score_mbu, MBU_LOG_FACTOR, out=score_mbu)
+    np.minimum(score_mbu, MBU_CAP, out=score_mbu)
 
     # ---------------------------------------------------------
     # 2. IDENTITY INTEGRITY SCORE (Tighter Tolerance)
@@ -34,23 +59,67 @@ def compute_aihs(df):
     # New Logic: Drift > 3.0 is Critical (0).
     # Range is now [1.0, 3.0] instead of [1.0, 5.0].
     
-    drift_capped = df['drift_ratio'].clip(lower=1.0, upper=3.0)
+    np.clip(drift_ratio, DRIFT_FLOOR, DRIFT_CEILING, out=score_drift)
     
     # Linear penalty over the tighter range
     # If Drift = 1.0 -> Penalty 0 -> Score 100
     # If Drift = 2.0 -> Penalty 50 -> Score 50
     # If Drift = 3.0 -> Penalty 100 -> Score 0
-    drift_penalty = ((drift_capped - 1.0) / 2.0) * 100
+    np.subtract(score_drift, DRIFT_FLOOR, out=score_drift)
+    np.divide(score_drift, DRIFT_CEILING - DRIFT_FLOOR, out=score_drift)
+    np.multiply(score_drift, 100, out=score_drift)
     
-    df['score_drift'] = 100 - drift_penalty
+    np.subtract(100, score_drift, out=score_drift)
 
     # ---------------------------------------------------------
     # 3. FINAL AIHS
     # ---------------------------------------------------------
     # Keep the 60/40 Split
-    df['AIHS'] = (0.6 * df['score_mbu']) + (0.4 * df['score_drift'])
+    np.multiply(score_mbu, MBU_WEIGHT, out=aihs)
+    np.multiply(score_drift, DRIFT_WEIGHT, out=scratch)
+    np.add(aihs, scratch, out=aihs)
     
     # Rounding
-    df['AIHS'] = df['AIHS'].round(2)
-    
-    return df
\ No newline at end of file
+    np.round(aihs, 2, out=aihs)
+
+    return score_mbu, score_drift, aihs
+
+def aihs_kernel_chunked(mbu_velocity, drift_ratio, score_mbu, score_drift, aihs, chunk_size=1_000_000):
+    """
+    Runs aihs_kernel over chunk_size slices of preallocated outputs, so the
+    only extra memory is one chunk-sized scratch buffer. Handy when the
+    inputs and outputs are memory-mapped files.
+    """
+    scratch = np.empty(min(chunk_size, len(aihs)), dtype=aihs.dtype)
+    for start in range(0, len(aihs), chunk_size):
+        end = min(start + chunk_size, len(aihs))
+        aihs_kernel(
+            mbu_velocity[start:end], drift_ratio[start:end],
+            score_mbu[start:end], score_drift[start:end], aihs[start:end],
+            scratch=scratch[:end - start],
+        )
+    return score_mbu, score_drift, aihs
+
+@instrumented()
+def compute_aihs(df, copy=True, dtype=None):
+    """
+    Recalibrated Scoring Logic (Stricter Benchmarks)
+    to handle high-velocity backlog clearing data.
+
+    Thin wrapper over aihs_kernel. copy=False adds the columns to df
+    itself; dtype defaults to float32 when both inputs are float32.
+    """
+    if copy:
+        df = df.copy()
+
+    v = df['mbu_velocity'].to_numpy()
+    d = df['drift_ratio'].to_numpy()
+    if dtype is None:
+        dtype = np.float32 if v.dtype == np.float32 and d.dtype == np.float32 else np.float64
+
+    score_mbu, score_drift, aihs = aihs_kernel(v, d, dtype=dtype)
+    df['score_mbu'] = score_mbu
+    df['score_drift'] = score_drift
+    df['AIHS'] = aihs
+
+    return df
@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import json
+import os
+import pandas as pd
+from input_cache import file_digest, load_normalized
+
+# Intermediate frames and the manifest of what produced them
+ARTIFACT_DIR = "artifacts"
+MANIFEST = "manifest.json"
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENROLL_PATH = "data/enrollment.csv"
+DEMO_PATH = "data/demographic.csv"
+BIO_PATH = "data/biometric.csv"
+SOURCES = {"enroll": ENROLL_PATH, "demo": DEMO_PATH, "bio": BIO_PATH}
+
+# Each stage: upstream stages, and the modules whose source it depends on.
+# A stage is stale when its inputs, its code or any upstream stage changed,
+# so editing scoring.py re-runs scoring and below but never load/features.
+STAGES = {
+    "load": {"deps": [], "code": ["input_cache.py", "feature_engineering.py"]},
+    "features": {"deps": ["load"], "code": ["feature_engineering.py", "schema.py", "key_codec.py",
+                                            "quantile_sketch.py"]},
+    "scoring": {"deps": ["features"], "code": ["scoring.py", "ml_pipeline.py"]},
+    "plots": {"deps": ["scoring"], "code": ["visualization.py", "rendering.py", "temporal.py"]},
+    "csv": {"deps": ["scoring"], "code": ["results_store.py"]},
+    "clean": {"deps": ["csv"], "code": ["clean_and_validate.py", "partitioned_output.py", "validation.py",
+                                        "temporal.py"]},
+}
+
+def _artifact(name, artifact_dir):
+    return os.path.join(artifact_dir, f"{name}.parquet")
+
+def _run_load(frames, artifact_dir, model_dir):
+    paths = []
+    for name, path in SOURCES.items():
+        out = _artifact(f"load_{name}", artifact_dir)
+        frames[f"load_{name}"] = load_normalized(path, use_cache=False)
+        frames[f"load_{name}"].to_parquet(out, index=False)
+        paths.append(out)
+    return paths
+
+def _run_features(frames, artifact_dir, model_dir):
+    from feature_engineering import build_features
+    enroll, demo, bio = (_frame(frames, f"load_{name}", artifact_dir) for name in SOURCES)
+    frames["features"] = build_features(enroll, demo, bio, normalized=True)
+    out = _artifact("features", artifact_dir)
+    frames["features"].to_parquet(out, index=False)
+    return [out]
+
+def _run_scoring(frames, artifact_dir, model_dir):
+    from ml_pipeline import run_analytical_pipeline
+    # Reads a copy: the in-memory features frame stays as it was written
+    df = _frame(frames, "features", artifact_dir).copy()
+    frames["scoring"], _ = run_analytical_pipeline(df, model_dir=model_dir)
+    out = _artifact("scoring", artifact_dir)
+    frames["scoring"].to_parquet(out, index=False)
+    return [out]
+
+def _run_plots(frames, artifact_dir, model_dir):
+    from visualization import plot_drift_heatmap, plot_risk_clusters
+    from rendering import render_figures
+    df = _frame(frames, "scoring", artifact_dir)
+    heatmaps, _ = render_figures([
+        (plot_drift_heatmap, (df[["district", "year", "month", "drift_ratio"]],), {}),
+        (plot_risk_clusters, (df[["drift_ratio", "mbu_velocity", "risk_cluster"]],), {}),
+    ])
+    return heatmaps + ["output/risk_clusters.png"]
+
+def _run_csv(frames, artifact_dir, model_dir):
+    from results_store import add_period
+    out = "output/aadhaar_pulse_analysis.csv"
+    add_period(_frame(frames, "scoring", artifact_dir)).to_csv(out, index=False)
+    return [out]
+
+def _run_clean(frames, artifact_dir, model_dir):
+    from clean_and_validate import clean_data_artifacts
+    out = "output/aadhaar_pulse_clean.csv"
+    clean_data_artifacts("output/aadhaar_pulse_analysis.csv", out)
+    return [out]
+
+RUNNERS = {
+    "load": _run_load,
+    "features": _run_features,
+    "scoring": _run_scoring,
+    "plots": _run_plots,
+    "csv": _run_csv,
+    "clean": _run_clean,
+}
+
+def _frame(frames, name, artifact_dir):
+    # Reuse what an earlier stage of this run produced, else its stored copy
+    if name not in frames:
+        frames[name] = pd.read_parquet(_artifact(name, artifact_dir))
+    return frames[name]
+
+def code_digest(modules):
+    """
+    SHA-256 over the source of the given repo modules.
+    """
+    h = hashlib.sha256()
+    for module in modules:
+        with open(os.path.join(MODULE_DIR, module), "rb") as f:
+            h.update(module.encode() + b"\0" + f.read())
+    return h.hexdigest()
+
+def fingerprints(model_dir="models"):
+    """
+    Fingerprint of every stage: its code, its upstream fingerprints and,
+    for load, the input file contents (for scoring, the model directory).
+    """
+    prints = {}
+    for stage, spec in STAGES.items():
+        parts = [stage, code_digest(spec["code"])] + [prints[d] for d in spec["deps"]]
+        if stage == "load":
+            parts += [f"{p}:{file_digest(p)}" for p in SOURCES.values()]
+        if stage == "scoring":
+            parts.append(os.path.abspath(model_dir))
+        prints[stage] = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    return prints
+
+def load_manifest(artifact_dir=ARTIFACT_DIR):
+    path = os.path.join(artifact_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def _save_manifest(manifest, artifact_dir):
+    tmp = os.path.join(artifact_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(artifact_dir, MANIFEST))
+
+def is_fresh(stage, prints, manifest):
+    entry = manifest.get(stage)
+    return (
+        entry is not None
+        and entry["fingerprint"] == prints[stage]
+        and all(os.path.exists(p) for p in entry["outputs"])
+    )
+
+def plan(targets, prints, manifest, only=False, force=False):
+    """
+    Stages to run for targets, in dependency order: every stale stage
+    they depend on, plus the targets themselves when stale (or forced).
+    With only=True, just the targets; their upstream artifacts must exist.
+    """
+    order = []
+    def visit(stage):
+        if stage in order:
+            return
+        if not only:
+            for dep in STAGES[stage]["deps"]:
+                visit(dep)
+        order.append(stage)
+    for stage in targets:
+        visit(stage)
+
+    stale = set()
+    for stage in order:
+        upstream_stale = any(d in stale for d in STAGES[stage]["deps"])
+        if (force and stage in targets) or upstream_stale or not is_fresh(stage, prints, manifest):
+            stale.add(stage)
+    return [stage for stage in order if stage in stale]
+
+def run_stages(targets=("clean", "plots"), artifact_dir=ARTIFACT_DIR, model_dir="models",
+               only=False, force=False):
+    """
+    Brings the targets up to date, re-running only the stale stages.
+    Returns the list of stages that ran.
+    """
+    unknown = [s for s in targets if s not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s) {unknown}; expected any of {list(STAGES)}")
+    missing = [p for p in SOURCES.values() if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"missing input files: {', '.join(missing)}")
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    os.makedirs("output", exist_ok=True)
+    os.makedirs(model_dir, exist_ok=True)
+    prints = fingerprints(model_dir)
+    manifest = load_manifest(artifact_dir)
+    todo = plan(targets, prints, manifest, only=only, force=force)
+
+    if only:
+        for stage in todo:
+            absent = [d for d in STAGES[stage]["deps"] if d not in manifest]
+            if absent:
+                raise RuntimeError(f"Stage '{stage}' needs {absent} to have run first.")
+
+    frames = {}
+    for stage in targets:
+        if stage not in todo:
+            print(f"[{stage}] up to date")
+    for stage in todo:
+        print(f"[{stage}] running...")
+        outputs = RUNNERS[stage](frames, artifact_dir, model_dir)
+        manifest[stage] = {"fingerprint": prints[stage], "outputs": outputs}
+        _save_manifest(manifest, artifact_dir)
+    return todo
+
+def status(artifact_dir=ARTIFACT_DIR, model_dir="models"):
+    """
+    One row per stage: whether its stored artifacts are current.
+    """
+    prints = fingerprints(model_dir)
+    manifest = load_manifest(artifact_dir)
+    stale = plan(list(STAGES), prints, manifest)
+    return pd.DataFrame({
+        "stage": list(STAGES),
+        "deps": [", ".join(spec["deps"]) for spec in STAGES.values()],
+        "state": ["stale" if s in stale else "fresh" for s in STAGES],
+    })
+
+if __name__ == "__main__":
+    # python stage_runner.py [stage ...] [--only] [--force] [--status]
+    parser = argparse.ArgumentParser(description="Aadhaar Pulse pipeline, stage by stage")
+    parser.add_argument("stages", nargs="*", default=["clean", "plots"],
+                        help=f"Target stages, any of: {', '.join(STAGES)} (default: clean plots).")
+    parser.add_argument("--only", action="store_true",
+                        help="Run just the named stages on their stored upstream artifacts.")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-run the named stages even when they are up to date.")
+    parser.add_argument("--status", action="store_true",
+                        help="Show which stages are stale and exit.")
+    parser.add_argument("--artifact-dir", default=ARTIFACT_DIR)
+    parser.add_argument("--model-dir", default="models")
+    args = parser.parse_args()
+
+    if args.status:
+        print(status(args.artifact_dir, args.model_dir).to_string(index=False))
+    else:
+        ran = run_stages(args.stages, args.artifact_dir, args.model_dir, only=args.only, force=args.force)
+        print(f"Ran: {', '.join(ran) if ran else 'nothing (all up to date)'}")
@@ -0,0 +1,125 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# Shape of the national data: ~36 states, ~780 districts, ~19k pincodes
+N_STATES = 36
+N_DISTRICTS = 780
+MAX_PINCODES = 19_000
+FIRST_PINCODE = 110_000
+PINCODE_STEP = 40             # keeps every pincode 6 digits
+YEARS = (2025, 2026)
+BAD_DATE_SHARE = 0.005        # unparseable dates, dropped by normalize_dates
+DORMANT_SHARE = 0.05          # pincodes with almost no adult biometric updates
+
+# Count columns per source, as build_features expects them
+SOURCE_COLUMNS = {
+    "enrollment": ["age_0_5", "age_5_17", "age_18_greater"],
+    "demographic": ["demo_age_5_17", "demo_age_17_"],
+    "biometric": ["bio_age_5_17", "bio_age_17_"],
+}
+# Mean count per row for each column
+COLUMN_MEANS = {
+    "age_0_5": 3.0, "age_5_17": 5.0, "age_18_greater": 2.0,
+    "demo_age_5_17": 4.0, "demo_age_17_": 8.0,
+    "bio_age_5_17": 6.0, "bio_age_17_": 3.0,
+}
+
+def geography(n_rows):
+    """
+    Pincode -> district -> state table. Smaller datasets get fewer
+    pincodes (about 50 rows each) so keys still repeat across rows.
+    """
+    n_pincodes = int(min(MAX_PINCODES, max(200, n_rows // 50)))
+    n_districts = min(N_DISTRICTS, max(N_STATES, n_pincodes // 25))
+    idx = np.arange(n_pincodes)
+    district = idx * n_districts // n_pincodes
+    state = district * N_STATES // n_districts
+    return pd.DataFrame({
+        "state": [f"State {s:02d}" for s in state],
+        "district": [f"District {d:03d}" for d in district],
+        "pincode": FIRST_PINCODE + idx * PINCODE_STEP,
+    })
+
+def _pincode_weights(n_pincodes, rng):
+    # Heavy-tailed activity: a few pincodes see most of the traffic
+    ranks = rng.permutation(n_pincodes) + 1
+    weights = 1.0 / (ranks + 10.0) ** 0.8
+    return weights / weights.sum()
+
+def _dates(rng, n):
+    day = rng.integers(1, 29, n)
+    month = rng.integers(1, 13, n)
+    year = rng.choice(YEARS, n)
+    dates = (
+        pd.Series(day).astype(str).str.zfill(2) + "-"
+        + pd.Series(month).astype(str).str.zfill(2) + "-"
+        + pd.Series(year).astype(str)
+    ).to_numpy(dtype=object)
+    dates[rng.random(n) < BAD_DATE_SHARE] = "not-a-date"
+    return dates
+
+def generate_chunk(source, n_rows, geo, weights, dormant, seed, chunk_index=0):
+    """
+    n_rows raw rows of one source (date, state, district, pincode, counts).
+    Deterministic in (seed, source, chunk_index).
+    """
+    source_id = list(SOURCE_COLUMNS).index(source)
+    rng = np.random.default_rng([seed, source_id, chunk_index])
+    pin = rng.choice(len(geo), size=n_rows, p=weights)
+    df = geo.iloc[pin].reset_index(drop=True)
+    df.insert(0, "date", _dates(rng, n_rows))
+    for col in SOURCE_COLUMNS[source]:
+        counts = rng.poisson(COLUMN_MEANS[col], n_rows)
+        if col == "bio_age_17_":
+            counts[dormant[pin]] = 0
+        df[col] = counts
+    return df
+
+def _setup(n_rows, seed):
+    geo = geography(n_rows)
+    rng = np.random.default_rng([seed, 99])
+    weights = _pincode_weights(len(geo), rng)
+    dormant = rng.random(len(geo)) < DORMANT_SHARE
+    return geo, weights, dormant
+
+def generate_sources(n_rows, seed=0):
+    """
+    In-memory (enrollment, demographic, biometric) raw frames with n_rows
+    rows each, identical for the same n_rows and seed.
+    """
+    geo, weights, dormant = _setup(n_rows, seed)
+    return tuple(
+        generate_chunk(source, n_rows, geo, weights, dormant, seed)
+        for source in SOURCE_COLUMNS
+    )
+
+def write_sources(out_dir, n_rows, seed=0, chunk_rows=1_000_000):
+    """
+    Writes <out_dir>/{enrollment,demographic,biometric}.csv with n_rows
+    rows each, one chunk at a time so 100M-row files fit in memory.
+    The same n_rows, seed and chunk_rows give byte-identical files.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    geo, weights, dormant = _setup(n_rows, seed)
+    paths = []
+    for source in SOURCE_COLUMNS:
+        path = os.path.join(out_dir, f"{source}.csv")
+        for i, start in enumerate(range(0, n_rows, chunk_rows)):
+            chunk = generate_chunk(source, min(chunk_rows, n_rows - start), geo, weights, dormant, seed, i)
+            chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        paths.append(path)
+        print(f"Generated: {path} ({n_rows:,} rows)")
+    return paths
+
+if __name__ == "__main__":
+    # python synthetic_data.py 1_000_000 --out data
+    parser = argparse.ArgumentParser(description="Deterministic synthetic Aadhaar input CSVs")
+    parser.add_argument("rows", type=lambda s: int(s.replace("_", "")),
+                        help="Rows per source file (10k to 100M).")
+    parser.add_argument("--out", default="data", help="Output directory.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    write_sources(args.out, args.rows, args.seed, args.chunk_rows)
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from instrumentation import instrumented
+
+# Columns that get month-over-month deltas and rolling means
+TEMPORAL_METRICS = ["AIHS", "drift_ratio", "mbu_velocity"]
+# Rolling window, in observed months of the same pincode
+ROLLING_WINDOW = 3
+# |z| at or above this marks an anomaly; z at or below -DIP_Z a dip
+DIP_Z = 2.0
+# A pincode is one (state, district, pincode) series
+PINCODE_KEYS = ["state", "district", "pincode"]
+DISTRICT_KEYS = ["state", "district"]
+
+def period_ordinal(year, month):
+    """
+    Months since year 0 as int32, so consecutive months differ by 1.
+    """
+    return (np.asarray(year, dtype=np.int32) * 12 + np.asarray(month, dtype=np.int32) - 1).astype(np.int32)
+
+def period_label(ordinal):
+    """
+    'YYYY-MM' labels for an array of period ordinals.
+    """
+    ordinal = np.asarray(ordinal)
+    year, month = np.divmod(ordinal, 12)
+    return pd.Index(year.astype(str)).str.cat(pd.Index(month + 1).astype(str).str.zfill(2), sep="-")
+
+def _group_starts(gid):
+    # Row position where each row's (sorted) group begins
+    new = np.ones(len(gid), dtype=bool)
+    new[1:] = gid[1:] != gid[:-1]
+    return np.maximum.accumulate(np.where(new, np.arange(len(gid)), 0))
+
+def _rolling_mean(values, starts, window):
+    # Trailing mean over up to window rows, never reaching before the group start
+    csum = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+    pos = np.arange(len(values))
+    lo = np.maximum(pos - window + 1, starts)
+    return (csum[pos + 1] - csum[lo]) / (pos + 1 - lo)
+
+def _unsort(values, order):
+    out = np.empty_like(values)
+    out[order] = values
+    return out
+
+def zscores(values, gid, n_groups):
+    """
+    (values - group mean) / group std for integer group ids, with bincount
+    sums instead of a groupby. Groups with zero spread get z = 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = np.bincount(gid, minlength=n_groups)
+    mean = np.bincount(gid, values, n_groups) / np.maximum(n, 1)
+    var = np.bincount(gid, values ** 2, n_groups) / np.maximum(n, 1) - mean ** 2
+    std = np.sqrt(np.maximum(var, 0))[gid]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(std > 0, (values - mean[gid]) / std, 0.0)
+    return z
+
+@instrumented()
+def add_temporal_features(df, metrics=TEMPORAL_METRICS, window=ROLLING_WINDOW, dip_z=DIP_Z):
+    """
+    Adds the time-series columns the plots and reports read, in one
+    vectorized pass over the rows sorted on (pincode, period):
+
+      period_ord           year * 12 + month - 1
+      <metric>_mom         change since the previous month of the same
+                           pincode (NaN when that month is missing)
+      <metric>_rolling     trailing mean over the pincode's last window months
+      AIHS_z, is_dip,      AIHS against the pincode's own history: z-score,
+      is_anomaly           z <= -dip_z, |z| >= dip_z
+      district_AIHS_z,     the same for the district's monthly mean AIHS,
+      district_is_dip      repeated on each of its rows
+
+    Rows come back in their original order.
+    """
+    df = df.copy()
+    ordinal = period_ordinal(df["year"], df["month"])
+    df["period_ord"] = ordinal
+
+    # Sort once: integer group id, then period
+    gid = df.groupby(PINCODE_KEYS, sort=False, observed=True).ngroup().to_numpy()
+    order = np.lexsort((ordinal, gid))
+    gid_s, ord_s = gid[order], ordinal[order]
+    starts = _group_starts(gid_s)
+
+    pos = np.arange(len(order))
+    prev_is_last_month = (pos > starts) & (ord_s - np.roll(ord_s, 1) == 1)
+
+    for col in metrics:
+        values = df[col].to_numpy(dtype=np.float64)[order]
+        mom = np.full(len(values), np.nan)
+        mom[prev_is_last_month] = (values - np.roll(values, 1))[prev_is_last_month]
+        rolling = _rolling_mean(values, starts, window)
+        df[f"{col}_mom"] = _unsort(mom, order)
+        df[f"{col}_rolling"] = _unsort(rolling, order)
+
+    aihs = df["AIHS"].to_numpy(dtype=np.float64)
+    z = zscores(aihs, gid, gid.max() + 1 if len(gid) else 0)
+    df["AIHS_z"] = z
+    df["is_dip"] = (z <= -dip_z).astype(np.int8)
+    df["is_anomaly"] = (np.abs(z) >= dip_z).astype(np.int8)
+
+    # District level: mean AIHS per (district, month), z-scored over the district's months
+    did = df.groupby(DISTRICT_KEYS, sort=False, observed=True).ngroup().to_numpy()
+    cell, cell_id = np.unique(did.astype(np.int64) * (ordinal.max() + 1 if len(ordinal) else 1) + ordinal,
+                              return_inverse=True)
+    cell_mean = np.bincount(cell_id, aihs, len(cell)) / np.bincount(cell_id, minlength=len(cell))
+    cell_district = did[np.unique(cell_id, return_index=True)[1]]
+    cell_z = zscores(cell_mean, cell_district, did.max() + 1 if len(did) else 0)
+    df["district_AIHS_z"] = cell_z[cell_id]
+    df["district_is_dip"] = (cell_z[cell_id] <= -dip_z).astype(np.int8)
+    return df
+
+def series_dips(values, dip_z=DIP_Z):
+    """
+    Positions in a 1-D series (e.g. a national per-period mean) whose
+    z-score is at or below -dip_z; the minimum when none is that low.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    z = zscores(values, np.zeros(len(values), dtype=np.int64), 1)
+    dips = np.flatnonzero(z <= -dip_z)
+    return dips if len(dips) else np.array([np.argmin(values)])
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+# Years the inputs can plausibly cover
+YEAR_RANGE = (2010, 2030)
+# Pincodes are 6 digits
+PINCODE_RANGE = (100_000, 999_999)
+# Columns that are keys or dates, never counts
+NON_COUNT_COLUMNS = ("pincode", "year", "month", "date")
+
+def _numeric(df, col):
+    # Non-numeric garbage becomes NaN, which every range check rejects
+    return pd.to_numeric(df[col], errors="coerce") if col in df.columns else None
+
+def _out_of_range(values, lo, hi):
+    if values is None:
+        return None
+    # Missing values (NaN / <NA>) count as out of range
+    return ~values.between(lo, hi).fillna(False).to_numpy(dtype=bool)
+
+def check_date(df, regions=None):
+    if "date" not in df.columns:
+        return None
+    dates = df["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, dayfirst=True, errors="coerce")
+    return dates.isna().to_numpy()
+
+def check_month(df, regions=None):
+    return _out_of_range(_numeric(df, "month"), 1, 12)
+
+def check_year(df, regions=None):
+    return _out_of_range(_numeric(df, "year"), *YEAR_RANGE)
+
+def check_pincode(df, regions=None):
+    return _out_of_range(_numeric(df, "pincode"), *PINCODE_RANGE)
+
+def check_counts(df, regions=None):
+    cols = [c for c in df.select_dtypes(include="number").columns if c not in NON_COUNT_COLUMNS]
+    if not cols:
+        return None
+    return df[cols].lt(0).any(axis=1).to_numpy(dtype=bool)
+
+def check_region(df, regions=None):
+    # Only runs against a reference list of (state, district) pairs
+    if regions is None or "state" not in df.columns or "district" not in df.columns:
+        return None
+    known = pd.MultiIndex.from_frame(regions[["state", "district"]].astype(str))
+    pairs = pd.MultiIndex.from_arrays([df["state"].astype(str), df["district"].astype(str)])
+    return ~pairs.isin(known)
+
+# Rule name -> vectorized check returning a boolean reject array (or None
+# when the columns it needs are absent). Each rule owns one bit of the
+# reject mask, in this order.
+RULES = {
+    "date": check_date,
+    "month": check_month,
+    "year": check_year,
+    "pincode": check_pincode,
+    "counts": check_counts,
+    "region": check_region,
+}
+
+def rule_bits(rules=None):
+    names = list(RULES) if rules is None else list(rules)
+    return {name: 1 << list(RULES).index(name) for name in names}
+
+def reject_mask(df, rules=None, regions=None):
+    """
+    One uint8 per row of df, with the bit of every rule the row fails set
+    (see rule_bits); 0 means the row is valid. Every rule is a single
+    vectorized check over the frame, and no filtered copies are made.
+    """
+    mask = np.zeros(len(df), dtype=np.uint8)
+    for name, bit in rule_bits(rules).items():
+        rejected = RULES[name](df, regions)
+        if rejected is not None:
+            mask |= np.where(rejected, bit, 0).astype(np.uint8)
+    return mask
+
+class ValidationReport:
+    """
+    Rule set plus running reject counts. apply() validates one frame or
+    chunk and adds its rejects to the counts, so the same report can be
+    carried through every chunk of a streamed file. regions is an optional
+    frame of known (state, district) pairs for the "region" rule.
+    """
+
+    def __init__(self, rules=None, regions=None):
+        self.rules = list(RULES) if rules is None else list(rules)
+        self.regions = regions
+        self.bits = rule_bits(self.rules)
+        self.rows = 0
+        self.rejected = 0
+        self.counts = dict.fromkeys(self.rules, 0)
+
+    def add(self, mask):
+        self.rows += len(mask)
+        self.rejected += int(np.count_nonzero(mask))
+        for name, bit in self.bits.items():
+            self.counts[name] += int(np.count_nonzero(mask & bit))
+        return self
+
+    def apply(self, df):
+        """
+        Valid rows of df; the reject mask only feeds the counts.
+        """
+        valid, mask = validate(df, self.rules, self.regions)
+        self.add(mask)
+        return valid
+
+    def summary(self):
+        return pd.Series(self.counts, name="rejected").rename_axis("rule")
+
+    def __repr__(self):
+        failing = ", ".join(f"{name}={n:,}" for name, n in self.counts.items() if n)
+        return f"{self.rejected:,} of {self.rows:,} rows rejected" + (f" ({failing})" if failing else "")
+
+def validate(df, rules=None, regions=None):
+    """
+    Runs the rules over df in one pass and returns (valid rows, reject
+    mask). The frame is only copied when some row is rejected.
+    """
+    mask = reject_mask(df, rules, regions)
+    if not mask.any():
+        return df, mask
+    return df[mask == 0], mask
+
+def load_regions(path):
+    """
+    Known (state, district) pairs from a CSV with those two columns.
+    """
+    return pd.read_csv(path, usecols=["state", "district"]).drop_duplicates()
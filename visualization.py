@@ -1,45 +1,117 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
+import numpy as np
+from rendering import pyplot, seaborn, save_figure
+from instrumentation import instrumented
+from temporal import period_ordinal, period_label
 
-def plot_drift_heatmap(df, output_path="output/drift_heatmap.png"):
+# Above these sizes the plots switch to their large-data rendering
+HEATMAP_MAX_DISTRICTS = 40       # rows per heatmap (top-N or per tile)
+HEATMAP_ANNOT_MAX_CELLS = 400    # numbers in cells only below this
+SCATTER_MAX_POINTS = 50_000      # beyond this, density instead of points
+
+def _drift_pivot(df):
+    # Mean drift per district and period ordinal; only the column labels become strings
+    pivot = (
+        df.groupby(["district", "period_ord"], observed=True)["drift_ratio"].mean()
+        .unstack("period_ord")
+        .sort_index(axis=1)
+    )
+    pivot.columns = period_label(pivot.columns.to_numpy()).rename("period")
+    return pivot
+
+def _draw_heatmap(pivot, output_path, title, annot_max_cells):
+    plt, sns = pyplot(), seaborn()
+    annotate = pivot.size <= annot_max_cells
+    height = max(6, 0.25 * len(pivot))
+    width = max(10, 0.45 * pivot.shape[1])
+    plt.figure(figsize=(width, height))
+    sns.heatmap(pivot, cmap="RdYlGn_r", annot=annotate, fmt=".1f", rasterized=not annotate)
+    plt.title(title)
+    plt.tight_layout()
+    save_figure(output_path)
+
+@instrumented()
+def plot_drift_heatmap(df, output_path="output/drift_heatmap.png", max_districts=HEATMAP_MAX_DISTRICTS,
+                       annot_max_cells=HEATMAP_ANNOT_MAX_CELLS, tiles=False):
     """
     Generates a correlation heatmap or geospatial proxy for the PDF.
+
+    With more than max_districts districts only the top max_districts by
+    mean drift are drawn (the highest-risk ones), or, with tiles=True, all
+    districts are split over numbered files of max_districts rows each.
+    Cell annotations are only drawn while the grid has at most
+    annot_max_cells cells.
     """
-    plt.figure(figsize=(10, 6))
-    
     # Pivot to see Drift Ratio by District over Time (Year-Month)
-    # Using 'date' string for axis
-    df['period'] = df['year'].astype(str) + "-" + df['month'].astype(str).str.zfill(2)
-    
-    pivot = df.pivot_table(
-        index="district", 
-        columns="period", 
-        values="drift_ratio", 
-        aggfunc="mean"
-    )
+    # Integer period ordinals (stored by add_temporal_features, else derived on a copy)
+    if "period_ord" not in df.columns:
+        df = df.assign(period_ord=period_ordinal(df['year'], df['month']))
     
-    sns.heatmap(pivot, cmap="RdYlGn_r", annot=True, fmt=".1f")
-    plt.title("Identity Drift Ratio by District (High Score = High Risk)")
-    plt.tight_layout()
-    plt.savefig(output_path)
-    print(f"Generated: {output_path}")
+    pivot = _drift_pivot(df)
+    title = "Identity Drift Ratio by District (High Score = High Risk)"
+
+    if len(pivot) <= max_districts:
+        _draw_heatmap(pivot, output_path, title, annot_max_cells)
+        return [output_path]
+
+    # Highest-risk districts first
+    pivot = pivot.loc[pivot.mean(axis=1).sort_values(ascending=False).index]
+
+    if not tiles:
+        _draw_heatmap(pivot.head(max_districts), output_path,
+                      f"{title}\nTop {max_districts} of {len(pivot)} districts by mean drift", annot_max_cells)
+        return [output_path]
 
-def plot_risk_clusters(df, output_path="output/risk_clusters.png"):
+    root, ext = output_path.rsplit(".", 1)
+    n_tiles = (len(pivot) + max_districts - 1) // max_districts
+    paths = []
+    for i in range(n_tiles):
+        tile = pivot.iloc[i * max_districts:(i + 1) * max_districts]
+        path = f"{root}_{i + 1:02d}.{ext}"
+        _draw_heatmap(tile, path, f"{title}\nDistricts {i * max_districts + 1}-{i * max_districts + len(tile)} "
+                                  f"of {len(pivot)} (by mean drift)", annot_max_cells)
+        paths.append(path)
+    return paths
+
+@instrumented()
+def plot_risk_clusters(df, output_path="output/risk_clusters.png", max_points=SCATTER_MAX_POINTS):
     """
     Scatter plot showing the separation of Risk Profiles.
+
+    Above max_points rows the individual points are replaced by a
+    rasterized hexbin density of all rows, with each cluster's median
+    position marked on top, so drawing cost no longer grows with the data.
     """
+    plt, sns = pyplot(), seaborn()
     plt.figure(figsize=(10, 6))
     
-    sns.scatterplot(
-        data=df, 
-        x="drift_ratio", 
-        y="mbu_velocity", 
-        hue="risk_cluster", 
-        palette="viridis",
-        s=100,
-        alpha=0.7
-    )
+    if len(df) <= max_points:
+        sns.scatterplot(
+            data=df, 
+            x="drift_ratio", 
+            y="mbu_velocity", 
+            hue="risk_cluster", 
+            palette="viridis",
+            s=100,
+            alpha=0.7
+        )
+    else:
+        x = df["drift_ratio"].to_numpy(dtype=float)
+        y = df["mbu_velocity"].to_numpy(dtype=float)
+        # Long tails would squash the bulk of the data into one corner
+        x_max = np.nanquantile(x, 0.995)
+        y_max = np.nanquantile(y, 0.995)
+        plt.hexbin(x, y, gridsize=80, bins="log", cmap="Greys", mincnt=1,
+                   extent=(0, x_max, 0, y_max), rasterized=True)
+        plt.colorbar(label="Pincode-months (log scale)")
+
+        medians = df.groupby("risk_cluster")[["drift_ratio", "mbu_velocity"]].median()
+        colors = sns.color_palette("viridis", len(medians))
+        for (cluster, row), color in zip(medians.iterrows(), colors):
+            plt.scatter(row["drift_ratio"], row["mbu_velocity"], s=250, color=color,
+                        edgecolor="black", marker="X", label=f"{cluster} (median)")
+        plt.xlim(0, x_max)
+        plt.ylim(0, y_max)
     
     plt.title("Risk Profiling: Identity Drift vs. MBU Velocity")
     plt.xlabel("Identity Drift (Demographic Changes / Bio Updates)")
@@ -47,5 +119,4 @@ def plot_risk_clusters(df, output_path="output/risk_clusters.png"):
     plt.axvline(x=1.5, color='r', linestyle='--', label='Critical Drift Threshold')
     plt.legend(title="Cluster Group")
     plt.grid(True, alpha=0.3)
-    plt.savefig(output_path)
-    print(f"Generated: {output_path}")
\ No newline at end of file
+    save_figure(output_path)